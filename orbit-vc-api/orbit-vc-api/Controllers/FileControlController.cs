@@ -365,6 +365,9 @@ namespace orbit_vc_api.Controllers
         [HttpPut("files")]
         public async Task<ActionResult> UpdateFile(MonitoredFile file)
         {
+            var policyError = ValidateHashPolicy(file);
+            if (policyError != null) return BadRequest(policyError);
+
             try
             {
                 var result = await _repository.UpdateMonitoredFileAsync(file);
@@ -378,6 +381,22 @@ namespace orbit_vc_api.Controllers
             }
         }
 
+        // Hashing policy fields are optional on update; only the ones supplied are checked
+        private static string? ValidateHashPolicy(MonitoredFile file)
+        {
+            if (file.HashMode != null)
+            {
+                file.HashMode = file.HashMode.Trim().ToUpperInvariant();
+                if (file.HashMode != "FULL" && file.HashMode != "SAMPLED")
+                    return "HashMode must be FULL or SAMPLED";
+            }
+            if (file.SampleBlockCount.HasValue && file.SampleBlockCount.Value <= 0)
+                return "SampleBlockCount must be greater than 0";
+            if (file.FullHashIntervalMinutes.HasValue && file.FullHashIntervalMinutes.Value <= 0)
+                return "FullHashIntervalMinutes must be greater than 0";
+            return null;
+        }
+
         [HttpDelete("files/{id}")]
         public async Task<ActionResult> DeleteFile(Guid id)
         {
@@ -544,6 +563,211 @@ namespace orbit_vc_api.Controllers
             public string? IpUsed { get; set; }
         }
 
+        /// <summary>
+        /// Restores every monitored file of a device to its latest stored version in one script run.
+        /// Files are restored concurrently by restore_file.py --bulk (atomic write + hash verification).
+        /// </summary>
+        [HttpPost("devices/{deviceId}/restore")]
+        public async Task<ActionResult> RestoreDeviceFiles(Guid deviceId)
+        {
+            try
+            {
+                var device = await _deviceRepository.GetByIdAsync(deviceId);
+                if (device == null) return NotFound("Device not found");
+
+                var sortedIps = await GetSortedIPAddressesAsync(device.ID);
+                if (string.IsNullOrEmpty(sortedIps))
+                    return BadRequest("No IP address found for device");
+
+                var files = await _repository.GetMonitoredFilesByDeviceAsync(deviceId);
+                var manifest = new List<object>();
+                var skipped = new List<object>();
+
+                foreach (var file in files)
+                {
+                    var version = await _repository.GetLatestFileVersionAsync(file.ID);
+                    if (version == null || string.IsNullOrEmpty(version.StoredDirectory) || !System.IO.File.Exists(version.StoredDirectory))
+                    {
+                        skipped.Add(new { monitoredFileId = file.ID, message = "Stored file not found on server" });
+                        continue;
+                    }
+                    if (string.IsNullOrEmpty(version.AbsoluteDirectory))
+                    {
+                        skipped.Add(new { monitoredFileId = file.ID, message = "Target path (AbsoluteDirectory) is not set" });
+                        continue;
+                    }
+
+                    manifest.Add(new
+                    {
+                        id = file.ID.ToString(),
+                        ip_addresses = sortedIps,
+                        dest_path = version.AbsoluteDirectory,
+                        source_path = version.StoredDirectory,
+                        expected_hash = version.FileHash
+                    });
+                }
+
+                if (manifest.Count == 0)
+                    return BadRequest(new { success = false, message = "No restorable files found for device", skipped });
+
+                var run = await RunBulkRestoreAsync(manifest);
+                var results = run.Results;
+                if (results.Count == 0 && run.Error != null)
+                    return StatusCode(500, new { success = false, message = $"Bulk restore script failed: {run.Error}" });
+
+                // Auto-clear uncleared and unacknowledged alerts of each restored file (same rule as single restore)
+                var clearedCount = 0;
+                foreach (var result in results.Where(r => r.Success && Guid.TryParse(r.Id, out _)))
+                {
+                    var alerts = await _repository.GetMonitoredFileAlertsAsync(Guid.Parse(result.Id!));
+                    foreach (var alert in alerts.Where(a => !a.IsCleared && !a.IsAcknowledged))
+                    {
+                        await _repository.ClearMonitoredFileAlertAsync(alert.ID, "System (Auto-cleared after restore)");
+                        clearedCount++;
+                    }
+                }
+
+                if (clearedCount > 0)
+                {
+                    _ = BroadcastAlertChangedAsync();
+                }
+
+                var succeeded = results.Count(r => r.Success);
+                var failed = results.Count - succeeded;
+                _logger.LogActivity("Bulk File Restore", $"Device {device.ID}: {succeeded} restored, {failed} failed, {skipped.Count} skipped");
+
+                // Files restored before a script failure are still reported (and their alerts cleared above)
+                var response = new
+                {
+                    success = run.Error == null && failed == 0 && skipped.Count == 0,
+                    message = run.Error == null ? null : $"Bulk restore script failed: {run.Error}",
+                    total = results.Count,
+                    succeeded,
+                    failed,
+                    alertsCleared = clearedCount,
+                    results = results.Select(r => new { monitoredFileId = r.Id, success = r.Success, message = r.Message, ipUsed = r.IpUsed }),
+                    skipped
+                };
+
+                if (run.Error != null)
+                    return StatusCode(500, response);
+
+                return Ok(response);
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError("System", "BULK_RESTORE_ERROR", $"Failed to restore files for device {deviceId}", ex);
+                return StatusCode(500, new { success = false, message = "Internal server error" });
+            }
+        }
+
+        /// <summary>
+        /// Runs restore_file.py --bulk. Per-file results parsed before a script failure are kept
+        /// and returned together with the error, since those files were already restored.
+        /// </summary>
+        private async Task<BulkRestoreRun> RunBulkRestoreAsync(List<object> manifest)
+        {
+            var run = new BulkRestoreRun();
+            var manifestPath = Path.Combine(Path.GetTempPath(), $"orbitvc-restore-{Guid.NewGuid()}.json");
+            try
+            {
+                var scriptPath = Path.Combine(_env.ContentRootPath, "PythonScripts", "02_Monitor_VersionControl", "restore_file.py");
+
+                if (!System.IO.File.Exists(scriptPath))
+                {
+                    _logger.LogError("System", "RESTORE_SCRIPT_ERROR", $"Python script not found at: {scriptPath}", null);
+                    run.Error = "Restore script not found";
+                    return run;
+                }
+
+                await System.IO.File.WriteAllTextAsync(manifestPath, JsonSerializer.Serialize(manifest));
+
+                var startInfo = new ProcessStartInfo
+                {
+                    FileName = "python",
+                    Arguments = $"\"{scriptPath}\" --bulk \"{manifestPath}\"",
+                    RedirectStandardOutput = true,
+                    RedirectStandardError = true,
+                    UseShellExecute = false,
+                    CreateNoWindow = true
+                };
+
+                using var process = new Process { StartInfo = startInfo };
+                process.Start();
+
+                // The script streams one JSON line per file (with "index"), followed by a summary line.
+                // A line with neither is a script-level error such as invalid options.
+                string? scriptMessage = null;
+                var errorTask = process.StandardError.ReadToEndAsync();
+                string? line;
+                while ((line = await process.StandardOutput.ReadLineAsync()) != null)
+                {
+                    if (string.IsNullOrWhiteSpace(line)) continue;
+                    try
+                    {
+                        using var doc = JsonDocument.Parse(line);
+                        var root = doc.RootElement;
+                        if (root.TryGetProperty("summary", out _)) continue;
+                        if (!root.TryGetProperty("index", out _))
+                        {
+                            scriptMessage = root.TryGetProperty("message", out var sm) ? sm.GetString() : line;
+                            continue;
+                        }
+
+                        run.Results.Add(new BulkRestoreItemResult
+                        {
+                            Id = root.TryGetProperty("id", out var id) ? id.GetString() : null,
+                            Success = root.TryGetProperty("success", out var success) && success.GetBoolean(),
+                            Message = root.TryGetProperty("message", out var m) ? m.GetString() : null,
+                            IpUsed = root.TryGetProperty("ip_used", out var ip) ? ip.GetString() : null
+                        });
+                    }
+                    catch (JsonException)
+                    {
+                        // Ignore non-JSON output lines
+                    }
+                }
+
+                var error = await errorTask;
+                await process.WaitForExitAsync();
+
+                if (process.ExitCode != 0)
+                {
+                    _logger.LogError("System", "BULK_RESTORE_SCRIPT_ERROR", $"Script failed (Exit Code: {process.ExitCode}) after {run.Results.Count} file result(s). Error: {scriptMessage ?? error}", null);
+                    run.Error = scriptMessage ?? $"Exit code {process.ExitCode}";
+                }
+
+                return run;
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError("System", "BULK_RESTORE_EXCEPTION", "Error running bulk restore script", ex);
+                run.Error = "Error running bulk restore script";
+                return run;
+            }
+            finally
+            {
+                if (System.IO.File.Exists(manifestPath))
+                {
+                    System.IO.File.Delete(manifestPath);
+                }
+            }
+        }
+
+        private class BulkRestoreRun
+        {
+            public List<BulkRestoreItemResult> Results { get; } = new List<BulkRestoreItemResult>();
+            public string? Error { get; set; }
+        }
+
+        private class BulkRestoreItemResult
+        {
+            public string? Id { get; set; }
+            public bool Success { get; set; }
+            public string? Message { get; set; }
+            public string? IpUsed { get; set; }
+        }
+
 
 
 
@@ -241,6 +241,7 @@ BEGIN
         [IPAddress] [nvarchar](100) NOT NULL,
         [Description] [nvarchar](100) NULL,
         [IsDeleted] [bit] NOT NULL DEFAULT 0,
+        [ModifiedDate] [datetime] NOT NULL DEFAULT GETDATE(),
         CONSTRAINT [PK_DeviceIPAddresses] PRIMARY KEY CLUSTERED ([ID] ASC)
     )
 
@@ -289,7 +290,20 @@ BEGIN
         [LastScan] [datetime] NULL,
         [IsDeleted] [bit] NOT NULL DEFAULT 0,
         [CreatedDate] [datetime] NOT NULL DEFAULT GETDATE(),
-        CONSTRAINT [PK_MonitoredFiles] PRIMARY KEY CLUSTERED ([ID] ASC)
+        -- Hashing policy: FULL = SHA-256 every scan, SAMPLED = fingerprint every scan, full hash on change / verify cadence
+        [HashMode] [nvarchar](20) NOT NULL DEFAULT 'FULL',
+        [SampleBlockCount] [int] NOT NULL DEFAULT 16,
+        [FullHashIntervalMinutes] [int] NOT NULL DEFAULT 1440,
+        -- Written by the Python monitor for SAMPLED files (LastFullHashDate uses the scheduler clock)
+        [LastFingerprint] [nvarchar](200) NULL,
+        [LastFileHash] [nvarchar](max) NULL,
+        [LastFullHashDate] [datetime] NULL,
+        -- Set on every change except LastScan / fingerprint cache; read by the Python state index for deltas
+        [ModifiedDate] [datetime] NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT [PK_MonitoredFiles] PRIMARY KEY CLUSTERED ([ID] ASC),
+        CONSTRAINT [CK_MonitoredFiles_HashMode] CHECK ([HashMode] IN ('FULL', 'SAMPLED')),
+        CONSTRAINT [CK_MonitoredFiles_SampleBlockCount] CHECK ([SampleBlockCount] > 0),
+        CONSTRAINT [CK_MonitoredFiles_FullHashIntervalMinutes] CHECK ([FullHashIntervalMinutes] > 0)
     )
 
     IF NOT EXISTS (SELECT * FROM sys.foreign_keys WHERE object_id = OBJECT_ID(N'[dbo].[FK_MonitoredFiles_Devices]') AND parent_object_id = OBJECT_ID(N'[dbo].[MonitoredFiles]'))
@@ -301,6 +315,31 @@ BEGIN
 END
 GO
 
+-- MonitoredFiles hashing policy columns (for databases created before they were added)
+IF COL_LENGTH('dbo.MonitoredFiles', 'HashMode') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[MonitoredFiles] ADD
+        [HashMode] [nvarchar](20) NOT NULL CONSTRAINT [DF_MonitoredFiles_HashMode] DEFAULT 'FULL',
+        [SampleBlockCount] [int] NOT NULL CONSTRAINT [DF_MonitoredFiles_SampleBlockCount] DEFAULT 16,
+        [FullHashIntervalMinutes] [int] NOT NULL CONSTRAINT [DF_MonitoredFiles_FullHashIntervalMinutes] DEFAULT 1440,
+        [LastFingerprint] [nvarchar](200) NULL,
+        [LastFileHash] [nvarchar](max) NULL,
+        [LastFullHashDate] [datetime] NULL
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.check_constraints WHERE name = 'CK_MonitoredFiles_HashMode')
+    ALTER TABLE [dbo].[MonitoredFiles] WITH CHECK ADD CONSTRAINT [CK_MonitoredFiles_HashMode] CHECK ([HashMode] IN ('FULL', 'SAMPLED'))
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.check_constraints WHERE name = 'CK_MonitoredFiles_SampleBlockCount')
+    ALTER TABLE [dbo].[MonitoredFiles] WITH CHECK ADD CONSTRAINT [CK_MonitoredFiles_SampleBlockCount] CHECK ([SampleBlockCount] > 0)
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.check_constraints WHERE name = 'CK_MonitoredFiles_FullHashIntervalMinutes')
+    ALTER TABLE [dbo].[MonitoredFiles] WITH CHECK ADD CONSTRAINT [CK_MonitoredFiles_FullHashIntervalMinutes] CHECK ([FullHashIntervalMinutes] > 0)
+GO
+
 -- MonitoredFileVersions
 IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[MonitoredFileVersions]') AND type in (N'U'))
 BEGIN
@@ -318,6 +357,7 @@ BEGIN
         [ParentDirectory] [nvarchar](max) NOT NULL,
         [IsDeleted] [bit] NOT NULL DEFAULT 0,
         [CreatedDate] [datetime] NOT NULL DEFAULT GETDATE(),
+        [ModifiedDate] [datetime] NOT NULL DEFAULT GETDATE(),
         CONSTRAINT [PK_MonitoredFileVersions] PRIMARY KEY CLUSTERED ([ID] ASC)
     )
 
@@ -400,3 +440,51 @@ BEGIN
         ON [dbo].[MonitoredFileChangeHistory]([MonitoredFileID], [VersionNo] DESC)
 END
 GO
+
+-- =============================================
+-- SCHEDULER TABLES
+-- =============================================
+
+/****** Object:  Table [dbo].[SchedulerNodes] ******/
+-- Lease rows for Python scheduler nodes (main.py). Each node heartbeats its row;
+-- rows older than the lease are treated as dead and their devices are rebalanced.
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[SchedulerNodes]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[SchedulerNodes](
+        [NodeID] [nvarchar](100) NOT NULL,
+        [HostName] [nvarchar](255) NULL,
+        [StartedDate] [datetime] NOT NULL DEFAULT GETDATE(),
+        [LastHeartbeat] [datetime] NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT [PK_SchedulerNodes] PRIMARY KEY CLUSTERED ([NodeID] ASC)
+    )
+
+    CREATE INDEX [IX_SchedulerNodes_LastHeartbeat]
+        ON [dbo].[SchedulerNodes]([LastHeartbeat])
+END
+GO
+
+-- ModifiedDate columns used by the Python scheduler's state index for incremental refresh
+-- (for databases created before they were added)
+IF COL_LENGTH('dbo.DeviceIPAddresses', 'ModifiedDate') IS NULL
+    ALTER TABLE [dbo].[DeviceIPAddresses] ADD [ModifiedDate] [datetime] NOT NULL CONSTRAINT [DF_DeviceIPAddresses_ModifiedDate] DEFAULT GETDATE()
+GO
+
+IF COL_LENGTH('dbo.MonitoredFiles', 'ModifiedDate') IS NULL
+    ALTER TABLE [dbo].[MonitoredFiles] ADD [ModifiedDate] [datetime] NOT NULL CONSTRAINT [DF_MonitoredFiles_ModifiedDate] DEFAULT GETDATE()
+GO
+
+IF COL_LENGTH('dbo.MonitoredFileVersions', 'ModifiedDate') IS NULL
+    ALTER TABLE [dbo].[MonitoredFileVersions] ADD [ModifiedDate] [datetime] NOT NULL CONSTRAINT [DF_MonitoredFileVersions_ModifiedDate] DEFAULT GETDATE()
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_DeviceIPAddresses_ModifiedDate' AND object_id = OBJECT_ID(N'[dbo].[DeviceIPAddresses]'))
+    CREATE INDEX [IX_DeviceIPAddresses_ModifiedDate] ON [dbo].[DeviceIPAddresses]([ModifiedDate])
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_MonitoredFiles_ModifiedDate' AND object_id = OBJECT_ID(N'[dbo].[MonitoredFiles]'))
+    CREATE INDEX [IX_MonitoredFiles_ModifiedDate] ON [dbo].[MonitoredFiles]([ModifiedDate])
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_MonitoredFileVersions_ModifiedDate' AND object_id = OBJECT_ID(N'[dbo].[MonitoredFileVersions]'))
+    CREATE INDEX [IX_MonitoredFileVersions_ModifiedDate] ON [dbo].[MonitoredFileVersions]([ModifiedDate])
+GO
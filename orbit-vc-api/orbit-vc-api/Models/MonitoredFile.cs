@@ -8,5 +8,16 @@ namespace orbit_vc_api.Models
         public DateTime? LastScan { get; set; }
         public bool IsDeleted { get; set; }
         public DateTime CreatedDate { get; set; }
+
+        // Hashing policy used by the Python monitor
+        // Null leaves the stored value unchanged on update (column defaults on insert)
+        public string? HashMode { get; set; } // FULL / SAMPLED
+        public int? SampleBlockCount { get; set; }
+        public int? FullHashIntervalMinutes { get; set; }
+
+        // Fingerprint cache maintained by the Python monitor (SAMPLED mode)
+        public string? LastFingerprint { get; set; }
+        public string? LastFileHash { get; set; }
+        public DateTime? LastFullHashDate { get; set; }
     }
 }
@@ -2,6 +2,11 @@ import sys
 import os
 import json
 import shutil
+import hashlib
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 
 def construct_unc_path(ip_address, file_path):
@@ -17,14 +22,38 @@ def construct_unc_path(ip_address, file_path):
         return None
 
 
-def try_restore_file(ip_address, dest_path, source_path):
+def compute_file_hash(filepath):
+    sha256_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def copy_with_hash(source_path, dest_path):
+    """Copy source to dest (data + timestamps like copy2) and return the SHA-256 of the bytes written."""
+    sha256_hash = hashlib.sha256()
+    with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+        for byte_block in iter(lambda: src.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+            dst.write(byte_block)
+    shutil.copystat(source_path, dest_path)
+    return sha256_hash.hexdigest()
+
+
+def try_restore_file(ip_address, dest_path, source_path, expected_hash=None, verify_readback=True):
     """
     Try to restore a file to remote UNC path using a specific IP address.
 
+    The file is written to a temporary name next to the destination and renamed into place
+    only after verification, so a failed or interrupted copy never leaves a partial file.
+
     Arguments:
         ip_address: IP address of the target machine
         dest_path: The destination path on the remote machine (e.g., C:/Users/...)
         source_path: The local source file path to copy from
+        expected_hash: SHA-256 of the stored version; the copied bytes must match it
+        verify_readback: re-read the temporary file from the target and compare hashes
 
     Returns:
         JSON result with success status
@@ -34,69 +63,268 @@ def try_restore_file(ip_address, dest_path, source_path):
     if not unc_path:
         return {"success": False, "message": "Destination path must be absolute with drive letter", "ip_used": ip_address}
 
+    temp_path = None
     try:
         # Ensure destination directory exists
         dest_dir = os.path.dirname(unc_path)
         if not os.path.exists(dest_dir):
             os.makedirs(dest_dir, exist_ok=True)
 
-        # Copy the file to UNC path
-        shutil.copy2(source_path, unc_path)
+        # Copy the file to a temporary name on the UNC path
+        temp_path = f"{unc_path}.{uuid.uuid4().hex[:8]}.restoring"
+        written_hash = copy_with_hash(source_path, temp_path)
 
-        # Verify the copy was successful
-        if os.path.exists(unc_path):
-            return {
-                "success": True,
-                "message": f"File restored successfully to {unc_path}",
-                "ip_used": ip_address,
-                "data": {
-                    "destinationPath": unc_path,
-                    "fileSize": str(os.path.getsize(unc_path))
-                }
+        if expected_hash and written_hash.lower() != expected_hash.lower():
+            return {"success": False, "message": f"Stored file hash mismatch (expected {expected_hash}, got {written_hash})", "ip_used": ip_address, "storedHashMismatch": True}
+
+        if verify_readback:
+            readback_hash = compute_file_hash(temp_path)
+            if readback_hash != written_hash:
+                return {"success": False, "message": "File copy completed but verification failed (hash mismatch on target)", "ip_used": ip_address}
+
+        os.replace(temp_path, unc_path)
+        temp_path = None
+
+        return {
+            "success": True,
+            "message": f"File restored successfully to {unc_path}",
+            "ip_used": ip_address,
+            "data": {
+                "destinationPath": unc_path,
+                "fileSize": str(os.path.getsize(unc_path)),
+                "fileHash": written_hash
             }
-        else:
-            return {"success": False, "message": "File copy completed but verification failed", "ip_used": ip_address}
+        }
 
     except PermissionError as e:
         return {"success": False, "message": f"Permission denied: {str(e)}", "ip_used": ip_address}
     except Exception as e:
         return {"success": False, "message": f"Failed to restore file: {str(e)}", "ip_used": ip_address}
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def parse_ip_list(ip_addresses):
+    """Accept a comma-separated string or a list, ordered by priority (Network-01, Network-02, etc.)"""
+    if isinstance(ip_addresses, str):
+        ip_addresses = ip_addresses.split(',')
+    return [str(ip).strip() for ip in ip_addresses if ip and str(ip).strip()]
 
 
-def restore_file(ip_addresses_str, dest_path, source_path):
+def restore_file(ip_addresses_str, dest_path, source_path, expected_hash=None, verify_readback=True):
     """
     Restore a file by trying multiple IP addresses in order.
-    IP addresses should be comma-separated, ordered by priority (Network-01, Network-02, etc.)
+    IP addresses should be comma-separated (or a list), ordered by priority (Network-01, Network-02, etc.)
     """
     # Check if source file exists first
     if not os.path.exists(source_path):
         return {"success": False, "message": f"Source file not found: {source_path}"}
 
-    # Split comma-separated IPs and trim whitespace
-    ip_list = [ip.strip() for ip in ip_addresses_str.split(',') if ip.strip()]
+    ip_list = parse_ip_list(ip_addresses_str)
 
     if not ip_list:
         return {"success": False, "message": "No IP addresses provided"}
 
+    # Check the stored version locally so a corrupt file is never copied over SMB
+    if expected_hash:
+        stored_hash = compute_file_hash(source_path)
+        if stored_hash.lower() != expected_hash.lower():
+            return {
+                "success": False,
+                "message": f"Stored file hash mismatch (expected {expected_hash}, got {stored_hash})",
+                "storedHashMismatch": True,
+                "ips_tried": []
+            }
+
     errors = []
+    ips_tried = []
 
     # Try each IP in order until one succeeds
     for ip in ip_list:
-        result = try_restore_file(ip, dest_path, source_path)
+        ips_tried.append(ip)
+        result = try_restore_file(ip, dest_path, source_path, expected_hash, verify_readback)
         if result["success"]:
             return result
         else:
             errors.append(f"{ip}: {result.get('message', 'Unknown error')}")
+            # The stored file changed during the copy; it fails the same way on every IP
+            if result.get("storedHashMismatch"):
+                break
 
-    # All IPs failed - return combined error message
+    message = "Failed to restore file using all available IPs" if len(ips_tried) == len(ip_list) else "Failed to restore file"
     return {
         "success": False,
-        "message": f"Failed to restore file using all available IPs. Errors: {'; '.join(errors)}",
-        "ips_tried": ip_list
+        "message": f"{message}. Errors: {'; '.join(errors)}",
+        "ips_tried": ips_tried
     }
 
 
+def bulk_restore(entries, max_workers=8, per_host=2, verify_readback=True, on_result=None):
+    """
+    Restore many files concurrently.
+
+    entries: list of dicts with
+        ip_addresses  - comma-separated string or list, in priority order
+        dest_path     - destination path on the device
+        source_path   - stored version file on the server
+        expected_hash - (optional) SHA-256 of the stored version
+        id            - (optional) caller reference echoed in the result
+    At most per_host restores run at once against the same device (same IP list),
+    and at most max_workers overall. Entries are queued per device and only submitted
+    when the device has a free slot, so a manifest grouped by device does not fill the
+    pool with copies waiting on one host. on_result(result) is called as each file finishes.
+
+    Returns the list of per-file results in completion order. An invalid entry or an
+    unexpected error produces a failure result for that entry instead of raising.
+    """
+    max_workers = max(1, max_workers)
+    per_host = max(1, per_host)
+
+    def host_key(entry):
+        try:
+            return ",".join(parse_ip_list(entry.get("ip_addresses", "")))
+        except Exception:
+            return ""
+
+    def restore_entry(index, entry):
+        if not isinstance(entry, dict):
+            return {"success": False, "message": "Manifest entry must be a JSON object", "index": index}
+        try:
+            result = restore_file(
+                parse_ip_list(entry.get("ip_addresses", "")),
+                entry.get("dest_path", ""),
+                entry.get("source_path", ""),
+                entry.get("expected_hash"),
+                verify_readback,
+            )
+        except Exception as e:
+            result = {"success": False, "message": f"Failed to restore file: {str(e)}"}
+        result["index"] = index
+        if "id" in entry:
+            result["id"] = entry["id"]
+        result["destPath"] = entry.get("dest_path")
+        return result
+
+    # Pending entries per device, in manifest order; devices are served round-robin
+    queues = {}
+    for index, entry in enumerate(entries):
+        key = host_key(entry) if isinstance(entry, dict) else ""
+        queues.setdefault(key, deque()).append((index, entry))
+    active = {key: 0 for key in queues}
+    running = {}
+
+    def submit_ready(executor):
+        submitted = True
+        while submitted and len(running) < max_workers:
+            submitted = False
+            for key in list(queues):
+                if len(running) >= max_workers:
+                    break
+                if active[key] >= per_host:
+                    continue
+                index, entry = queues[key].popleft()
+                if not queues[key]:
+                    del queues[key]
+                running[executor.submit(restore_entry, index, entry)] = key
+                active[key] += 1
+                submitted = True
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        submit_ready(executor)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                active[running.pop(future)] -= 1
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+            submit_ready(executor)
+    return results
+
+
+def load_manifest(manifest_path):
+    """Manifest is a JSON array of entries, or JSON lines (one entry per line). '-' reads stdin."""
+    if manifest_path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    text = text.strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def bulk_command_line_mode(args):
+    """
+    Usage: restore_file.py --bulk <manifest.json|-> [--workers N] [--per-host N] [--no-readback]
+    Prints one JSON line per file as it completes, then a summary line.
+    """
+    usage = "Usage: --bulk <manifest.json|-> [--workers N] [--per-host N] [--no-readback]"
+    options = {"--workers": 8, "--per-host": 2}
+    manifest_path = None
+    verify_readback = True
+
+    i = 0
+    while i < len(args):
+        if args[i] in options:
+            value = args[i + 1] if i + 1 < len(args) else ""
+            if not value.isdigit() or int(value) < 1:
+                print(json.dumps({"success": False, "message": f"{args[i]} expects a positive integer. {usage}"}))
+                sys.exit(1)
+            options[args[i]] = int(value)
+            i += 2
+        elif args[i] == "--no-readback":
+            verify_readback = False
+            i += 1
+        elif args[i].startswith("--") or manifest_path:
+            print(json.dumps({"success": False, "message": f"Unexpected argument: {args[i]}. {usage}"}))
+            sys.exit(1)
+        else:
+            manifest_path = args[i]
+            i += 1
+
+    if not manifest_path:
+        print(json.dumps({"success": False, "message": usage}))
+        sys.exit(1)
+
+    try:
+        entries = load_manifest(manifest_path)
+        if not isinstance(entries, list):
+            raise ValueError("expected a JSON array or JSON lines")
+    except Exception as e:
+        print(json.dumps({"success": False, "message": f"Failed to read manifest: {str(e)}"}))
+        sys.exit(1)
+
+    print_lock = threading.Lock()
+
+    def emit(result):
+        with print_lock:
+            print(json.dumps(result), flush=True)
+
+    results = bulk_restore(entries, options["--workers"], options["--per-host"], verify_readback, emit)
+    succeeded = sum(1 for r in results if r.get("success"))
+    print(json.dumps({
+        "summary": True,
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }), flush=True)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--bulk":
+        bulk_command_line_mode(sys.argv[2:])
+        sys.exit(0)
+
     if len(sys.argv) < 4:
         # Expecting: script.py <ip_addresses> <dest_path> <source_path>
         # ip_addresses can be comma-separated: "10.1.1.1,192.168.1.1"
@@ -264,7 +264,8 @@ namespace orbit_vc_api.Repositories
                 UPDATE DeviceIPAddresses 
                 SET IPAddressTypeID = @IPAddressTypeID,
                     IPAddress = @IPAddress,
-                    Description = @Description
+                    Description = @Description,
+                    ModifiedDate = GETDATE()
                 WHERE ID = @ID AND IsDeleted = 0";
 
             var rowsAffected = await connection.ExecuteAsync(sql, ipAddress);
@@ -274,7 +275,7 @@ namespace orbit_vc_api.Repositories
         public async Task<bool> DeleteIPAddressAsync(Guid id)
         {
             using var connection = CreateConnection();
-            const string sql = "UPDATE DeviceIPAddresses SET IsDeleted = 1 WHERE ID = @Id";
+            const string sql = "UPDATE DeviceIPAddresses SET IsDeleted = 1, ModifiedDate = GETDATE() WHERE ID = @Id";
             var rowsAffected = await connection.ExecuteAsync(sql, new { Id = id });
             return rowsAffected > 0;
         }
@@ -282,7 +283,7 @@ namespace orbit_vc_api.Repositories
         public async Task<bool> DeleteIPAddressesByDeviceIdAsync(Guid deviceId)
         {
             using var connection = CreateConnection();
-            const string sql = "UPDATE DeviceIPAddresses SET IsDeleted = 1 WHERE DeviceID = @DeviceId";
+            const string sql = "UPDATE DeviceIPAddresses SET IsDeleted = 1, ModifiedDate = GETDATE() WHERE DeviceID = @DeviceId";
             await connection.ExecuteAsync(sql, new { DeviceId = deviceId });
             return true;
         }
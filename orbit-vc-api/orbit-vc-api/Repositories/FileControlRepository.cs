@@ -92,9 +92,10 @@ namespace orbit_vc_api.Repositories
 
             const string sql = @"
                 INSERT INTO MonitoredFiles 
-                (ID, DeviceID, LastScan, IsDeleted, CreatedDate)
+                (ID, DeviceID, LastScan, IsDeleted, CreatedDate, HashMode, SampleBlockCount, FullHashIntervalMinutes)
                 VALUES 
-                (@ID, @DeviceID, @LastScan, @IsDeleted, @CreatedDate)";
+                (@ID, @DeviceID, @LastScan, @IsDeleted, @CreatedDate,
+                 COALESCE(@HashMode, 'FULL'), COALESCE(@SampleBlockCount, 16), COALESCE(@FullHashIntervalMinutes, 1440))";
 
             await connection.ExecuteAsync(sql, file);
             return file.ID;
@@ -106,7 +107,11 @@ namespace orbit_vc_api.Repositories
             const string sql = @"
                 UPDATE MonitoredFiles 
                 SET LastScan = @LastScan,
-                    IsDeleted = @IsDeleted
+                    IsDeleted = @IsDeleted,
+                    HashMode = COALESCE(@HashMode, HashMode),
+                    SampleBlockCount = COALESCE(@SampleBlockCount, SampleBlockCount),
+                    FullHashIntervalMinutes = COALESCE(@FullHashIntervalMinutes, FullHashIntervalMinutes),
+                    ModifiedDate = GETDATE()
                 WHERE ID = @ID";
 
             var rowsAffected = await connection.ExecuteAsync(sql, file);
@@ -116,7 +121,7 @@ namespace orbit_vc_api.Repositories
         public async Task<bool> DeleteMonitoredFileAsync(Guid id)
         {
             using var connection = CreateConnection();
-            const string sql = "UPDATE MonitoredFiles SET IsDeleted = 1 WHERE ID = @Id";
+            const string sql = "UPDATE MonitoredFiles SET IsDeleted = 1, ModifiedDate = GETDATE() WHERE ID = @Id";
             var rowsAffected = await connection.ExecuteAsync(sql, new { Id = id });
             return rowsAffected > 0;
         }
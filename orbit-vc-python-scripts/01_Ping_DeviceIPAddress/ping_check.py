@@ -6,6 +6,17 @@ import os
 import sys
 import uuid
 import json
+import re
+import time
+
+# Shared helpers (partitioning, ...) live in the scripts root next to main.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import partitioning
+import metrics
+import state_index
+
+# Label used for this module's metrics (matches the module name in config.json)
+METRICS_MODULE = "PingCheck"
 
 # Setup basic logging for module level (will be overridden by main.py logger if imported)
 logger = logging.getLogger(__name__)
@@ -33,9 +44,13 @@ def connect_db(config):
         logger.error(f"Database connection failed: {e}")
         return None
 
-def ping(host):
+RTT_PATTERN = re.compile(r"time[=<]\s*([\d.]+)\s*ms", re.IGNORECASE)
+
+def ping_rtt(host):
     """
-    Returns True if host (str) responds to a ping request.
+    Pings host (str) once.
+    Returns (is_up, rtt_seconds). rtt_seconds is parsed from the ping output and falls back
+    to the wall time of the ping command when the output has no "time=" field.
     """
     param_count = '-n' if platform.system().lower() == 'windows' else '-c'
     param_wait = '-w' if platform.system().lower() == 'windows' else '-W'
@@ -43,27 +58,50 @@ def ping(host):
     
     command = ['ping', param_count, '1', param_wait, wait_time, host]
     
+    start = time.perf_counter()
     try:
-        subprocess.check_output(command, stderr=subprocess.STDOUT)
-        return True
+        output = subprocess.check_output(command, stderr=subprocess.STDOUT)
     except:
-        return False
+        return False, None
+    elapsed = time.perf_counter() - start
+
+    match = RTT_PATTERN.search(output.decode(errors='ignore'))
+    if match:
+        return True, float(match.group(1)) / 1000.0
+    return True, elapsed
+
+def ping(host):
+    """
+    Returns True if host (str) responds to a ping request.
+    """
+    is_up, _ = ping_rtt(host)
+    return is_up
 
 def run(config):
     # This run() function is for the scheduled DB sync mode
     logger.info("Starting Ping Check Task...")
+    started = time.perf_counter()
     
     conn = connect_db(config)
     if not conn:
+        metrics.inc("orbitvc_module_errors_total", module=METRICS_MODULE)
         return
 
     try:
-        cursor = conn.cursor()
+        cursor = metrics.CountingCursor(conn.cursor(), METRICS_MODULE)
+
+        # Resident index (main.py with state_index enabled): only deltas are read from the DB
+        index = state_index.get_index(config)
+        if index:
+            index.refresh(cursor)
         
         # 1. Get Status Types Dictionary from [ConnectionStatusTypes]
-        cursor.execute("SELECT ID, Name FROM [ConnectionStatusTypes] WHERE IsDeleted = 0")
-        rows = cursor.fetchall()
-        status_map = {row.Name: row.ID for row in rows}
+        if index:
+            status_map = index.status_types
+        else:
+            cursor.execute("SELECT ID, Name FROM [ConnectionStatusTypes] WHERE IsDeleted = 0")
+            rows = cursor.fetchall()
+            status_map = {row.Name: row.ID for row in rows}
         
         # Database normally uses 'UP' and 'DOWN' for status
         online_id = status_map.get('UP')
@@ -77,50 +115,107 @@ def run(config):
         
         if not online_id:
             logger.error("Required 'UP' or 'Online' status type missing in database.")
+            metrics.inc("orbitvc_module_errors_total", module=METRICS_MODULE)
             return
 
         # 2. Get Device IPs
-        cursor.execute("SELECT ID, IPAddress FROM DeviceIPAddresses WHERE IsDeleted = 0")
-        devices = cursor.fetchall()
+        if index:
+            devices = index.ip_records()
+        else:
+            cursor.execute("SELECT ID, DeviceID, IPAddress FROM DeviceIPAddresses WHERE IsDeleted = 0")
+            devices = cursor.fetchall()
+
+        # Only check the devices assigned to this scheduler node
+        devices = [dev for dev in devices if partitioning.owns(config, dev.DeviceID)]
         
         logger.info(f"Found {len(devices)} IP addresses to check.")
+        metrics.set_gauge("orbitvc_ping_hosts", len(devices), module=METRICS_MODULE)
+
+        # Per-host series are opt-in: one series per IP gets large on big fleets
+        per_host_metrics = config.get('metrics', {}).get('per_host', False)
+
+        # Per-host lines are DEBUG (enable with logging.levels.PingCheck = DEBUG); one summary line per run
+        up_count = 0
+        down_ips = []
+        # Status row IDs for the index, applied only once the run's writes are committed
+        new_status_rows = {}
         
-        for dev in devices:
+        for position, dev in enumerate(devices):
+            # Ownership can change mid-run: stop once this node's lease is gone, and skip
+            # devices that moved to a node which joined during the run
+            if partitioning.lease_lost(config):
+                logger.warning(f"Cluster lease lost; skipping the remaining {len(devices) - position} IP addresses")
+                break
+            if not partitioning.owns(config, dev.DeviceID):
+                continue
+
             ip_id = dev.ID
             ip_addr = dev.IPAddress
             
-            is_up = ping(ip_addr)
+            is_up, rtt = ping_rtt(ip_addr)
             status_id = online_id if is_up else offline_id
             
             status_text = "UP" if is_up else "DOWN"
-            logger.info(f"Pinging {ip_addr} ... {status_text}")
+            logger.debug(f"Pinging {ip_addr} ... {status_text}")
+            if is_up:
+                up_count += 1
+            else:
+                down_ips.append(ip_addr)
+
+            metrics.inc("orbitvc_ping_checks_total", module=METRICS_MODULE, result=status_text)
+            if is_up:
+                metrics.observe("orbitvc_ping_rtt_seconds", rtt, module=METRICS_MODULE)
+            if per_host_metrics:
+                metrics.set_gauge("orbitvc_ping_host_up", 1 if is_up else 0, ip=ip_addr)
+                if is_up:
+                    metrics.set_gauge("orbitvc_ping_host_rtt_seconds", rtt, ip=ip_addr)
             
             # 3. Update or Insert Status
-            # Check for existing record
-            check_sql = "SELECT ID FROM DeviceIPAddressConnectionStatus WHERE DeviceIPAddressID = ? AND IsDeleted = 0"
-            cursor.execute(check_sql, ip_id)
-            existing = cursor.fetchone()
+            # Check for existing record (the index remembers status rows it has already seen)
+            existing_id = index.status_row_id(ip_id) if index else None
+            if existing_id is None:
+                check_sql = "SELECT ID FROM DeviceIPAddressConnectionStatus WHERE DeviceIPAddressID = ? AND IsDeleted = 0"
+                cursor.execute(check_sql, ip_id)
+                existing = cursor.fetchone()
+                existing_id = existing.ID if existing else None
             
-            if existing:
+            if existing_id:
                 update_sql = """
                     UPDATE DeviceIPAddressConnectionStatus 
                     SET ConnectionStatusTypeID = ?, LastCheckedDate = GETDATE()
                     WHERE ID = ?
                 """
-                cursor.execute(update_sql, (status_id, existing.ID))
-            else:
+                cursor.execute(update_sql, (status_id, existing_id))
+                if cursor.rowcount == 0:
+                    # Row cached by the index no longer exists; insert a new one
+                    existing_id = None
+
+            if not existing_id:
                 insert_sql = """
                     INSERT INTO DeviceIPAddressConnectionStatus 
                     (ID, DeviceIPAddressID, ConnectionStatusTypeID, IsDeleted, LastCheckedDate)
                     VALUES (?, ?, ?, 0, GETDATE())
                 """
-                cursor.execute(insert_sql, (uuid.uuid4(), ip_id, status_id))
+                existing_id = uuid.uuid4()
+                cursor.execute(insert_sql, (existing_id, ip_id, status_id))
+                new_status_rows[ip_id] = existing_id
         
         conn.commit()
+        if index:
+            for ip_id, status_row_id in new_status_rows.items():
+                index.set_status_row_id(ip_id, status_row_id)
+
+        summary = f"Ping summary: {up_count} UP, {len(down_ips)} DOWN of {len(devices)} in {time.perf_counter() - started:.1f}s"
+        if down_ips:
+            shown = ", ".join(down_ips[:20])
+            more = f" (+{len(down_ips) - 20} more)" if len(down_ips) > 20 else ""
+            summary += f". DOWN: {shown}{more}"
+        logger.info(summary)
         logger.info("Ping Check Task Completed Successfully.")
         
     except Exception as e:
         logger.error(f"Error during ping check execution: {e}")
+        metrics.inc("orbitvc_module_errors_total", module=METRICS_MODULE)
     finally:
         conn.close()
 
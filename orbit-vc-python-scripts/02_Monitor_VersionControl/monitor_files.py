@@ -1,15 +1,25 @@
 import os
 import hashlib
-import pyodbc
 import uuid
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import shutil
+import sys
+
+# Shared helpers (partitioning, ...) live in the scripts root next to main.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import partitioning
+import metrics
+import state_index
 
 # Setup module-level logger
 logger = logging.getLogger("MonitorVersionControl")
 
+# Label used for this module's metrics (matches the module name in config.json)
+METRICS_MODULE = "MonitorVersionControl"
+
 def get_db_connection(config):
+    import pyodbc
     db_config = config['database']
     conn_str = (
         f"DRIVER={db_config['driver']};"
@@ -23,12 +33,50 @@ def get_db_connection(config):
 
 def compute_file_hash(filepath):
     sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        # Read and update hash string value in blocks of 4K
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+    bytes_read = 0
+    with metrics.timer("orbitvc_file_hash_seconds", module=METRICS_MODULE, kind="full"):
+        with open(filepath, "rb") as f:
+            # Read and update hash string value in blocks of 4K
+            for byte_block in iter(lambda: f.read(4096), b""):
+                sha256_hash.update(byte_block)
+                bytes_read += len(byte_block)
+    metrics.inc("orbitvc_files_hashed_total", module=METRICS_MODULE, kind="full")
+    metrics.inc("orbitvc_smb_bytes_read_total", bytes_read, module=METRICS_MODULE)
     return sha256_hash.hexdigest()
 
+def compute_file_fingerprint(filepath, sample_blocks=16, block_size=65536):
+    """
+    Fast fingerprint for very large files (HashMode = 'SAMPLED').
+    Hashes size, mtime, the head and tail blocks and N strided sample blocks, so only
+    (sample_blocks + 2) * block_size bytes are read over SMB instead of the whole file.
+    Small files are hashed in full since sampling would read most of them anyway.
+    """
+    stat = os.stat(filepath)
+    size = stat.st_size
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{size}:{stat.st_mtime_ns}".encode("utf-8"))
+    bytes_read = 0
+
+    with metrics.timer("orbitvc_file_hash_seconds", module=METRICS_MODULE, kind="sampled"):
+        with open(filepath, "rb") as f:
+            if size <= block_size * (sample_blocks + 2):
+                for byte_block in iter(lambda: f.read(block_size), b""):
+                    fingerprint.update(byte_block)
+                    bytes_read += len(byte_block)
+            else:
+                offsets = [0]
+                offsets += [(size * i) // (sample_blocks + 1) for i in range(1, sample_blocks + 1)]
+                offsets.append(size - block_size)
+                for offset in offsets:
+                    f.seek(offset)
+                    byte_block = f.read(block_size)
+                    fingerprint.update(byte_block)
+                    bytes_read += len(byte_block)
+
+    metrics.inc("orbitvc_files_hashed_total", module=METRICS_MODULE, kind="sampled")
+    metrics.inc("orbitvc_smb_bytes_read_total", bytes_read, module=METRICS_MODULE)
+    return f"v1:{fingerprint.hexdigest()}"
+
 def construct_unc_path(ip, full_path_on_device):
     drive, path_tail = os.path.splitdrive(full_path_on_device)
     if drive:
@@ -57,36 +105,63 @@ def try_access_file_with_ips(ip_list, full_path_on_device):
 
 def run(config):
     logger.info("Starting Version Control Monitor check...")
+    started = datetime.now()
+    # Per-run tally for the summary line; per-file detail is logged at DEBUG
+    results = {}
     conn = None
     try:
         conn = get_db_connection(config)
-        cursor = conn.cursor()
-
-        # Get all monitored files with their latest version info
-        # IMPORTANT: Always compare against the ORIGINAL version hash (v.FileHash), NOT change history
-        # This ensures that after restore, the file is considered "in sync" with the original
-        # Change history is only for tracking detected changes, not for determining expected state
-        cursor.execute("""
-            SELECT
-                mf.ID,
-                mf.DeviceID,
-                v.ID AS MonitoredFileVersionID,
-                v.AbsoluteDirectory,
-                v.FileName,
-                v.ParentDirectory,
-                v.FileHash,
-                v.FileSize,
-                v.FileDateModified,
-                COALESCE((SELECT MAX(VersionNo) FROM MonitoredFileChangeHistory WHERE MonitoredFileID = mf.ID), 0) AS ChangeHistoryVersionNo
-            FROM MonitoredFiles mf
-            LEFT JOIN MonitoredFileVersions v ON mf.ID = v.MonitoredFileID
-                AND v.VersionNo = (SELECT MAX(VersionNo) FROM MonitoredFileVersions WHERE MonitoredFileID = mf.ID)
-            WHERE mf.IsDeleted = 0
-        """)
-
-        rows = cursor.fetchall()
-
-        for row in rows:
+        cursor = metrics.CountingCursor(conn.cursor(), METRICS_MODULE)
+
+        # Resident index (main.py with state_index enabled): only deltas are read from the DB
+        index = state_index.get_index(config)
+        if index:
+            index.refresh(cursor)
+            rows = index.file_records()
+        else:
+            # Get all monitored files with their latest version info
+            # IMPORTANT: Always compare against the ORIGINAL version hash (v.FileHash), NOT change history
+            # This ensures that after restore, the file is considered "in sync" with the original
+            # Change history is only for tracking detected changes, not for determining expected state
+            cursor.execute("""
+                SELECT
+                    mf.ID,
+                    mf.DeviceID,
+                    v.ID AS MonitoredFileVersionID,
+                    v.AbsoluteDirectory,
+                    v.FileName,
+                    v.ParentDirectory,
+                    v.FileHash,
+                    v.FileSize,
+                    v.FileDateModified,
+                    mf.HashMode,
+                    mf.SampleBlockCount,
+                    mf.FullHashIntervalMinutes,
+                    mf.LastFingerprint,
+                    mf.LastFileHash,
+                    mf.LastFullHashDate,
+                    COALESCE((SELECT MAX(VersionNo) FROM MonitoredFileChangeHistory WHERE MonitoredFileID = mf.ID), 0) AS ChangeHistoryVersionNo
+                FROM MonitoredFiles mf
+                LEFT JOIN MonitoredFileVersions v ON mf.ID = v.MonitoredFileID
+                    AND v.VersionNo = (SELECT MAX(VersionNo) FROM MonitoredFileVersions WHERE MonitoredFileID = mf.ID)
+                WHERE mf.IsDeleted = 0
+            """)
+
+            rows = cursor.fetchall()
+
+        # Only scan the files of devices assigned to this scheduler node
+        rows = [row for row in rows if partitioning.owns(config, row.DeviceID)]
+        metrics.set_gauge("orbitvc_monitored_files", len(rows), module=METRICS_MODULE)
+
+        for position, row in enumerate(rows):
+            # Ownership can change mid-run: stop once this node's lease is gone, and skip
+            # files whose device moved to a node which joined during the run
+            if partitioning.lease_lost(config):
+                logger.warning(f"Cluster lease lost; skipping the remaining {len(rows) - position} monitored files")
+                break
+            if not partitioning.owns(config, row.DeviceID):
+                continue
+
             try:
                 file_id = row.ID
                 device_id = row.DeviceID
@@ -108,27 +183,30 @@ def run(config):
                     continue
 
                 # Get all IP Addresses sorted by IPAddressType name (Network-01, Network-02, etc.)
-                cursor.execute("""
-                    SELECT ip.IPAddress
-                    FROM DeviceIPAddresses ip
-                    LEFT JOIN IPAddressTypes ipt ON ip.IPAddressTypeID = ipt.ID
-                    WHERE ip.DeviceID = ? AND ip.IsDeleted = 0
-                    ORDER BY ISNULL(ipt.Name, 'zzz')
-                """, device_id)
-                ip_rows = cursor.fetchall()
-
-                if not ip_rows:
+                if index:
+                    ip_list = index.ip_list_for_device(device_id)
+                else:
+                    cursor.execute("""
+                        SELECT ip.IPAddress
+                        FROM DeviceIPAddresses ip
+                        LEFT JOIN IPAddressTypes ipt ON ip.IPAddressTypeID = ipt.ID
+                        WHERE ip.DeviceID = ? AND ip.IsDeleted = 0
+                        ORDER BY ISNULL(ipt.Name, 'zzz')
+                    """, device_id)
+                    ip_list = [ip_row[0] for ip_row in cursor.fetchall() if ip_row[0]]
+
+                if not ip_list:
                     logger.warning(f"No IP found for device {device_id}, skipping {file_name}")
                     continue
 
-                ip_list = [row[0] for row in ip_rows if row[0]]
-
                 # Try to access file using multiple IPs in priority order
                 file_accessible, full_path, ip_used = try_access_file_with_ips(ip_list, abs_directory)
 
                 if not file_accessible:
                     # File was deleted - create DELETED alert
-                    logger.warning(f"File DELETED or not accessible: {full_path}")
+                    logger.debug(f"File DELETED or not accessible: {full_path}")
+                    metrics.inc("orbitvc_monitor_files_total", module=METRICS_MODULE, result="DELETED")
+                    results['DELETED'] = results.get('DELETED', 0) + 1
 
                     # Check if there's already an uncleared DELETED alert for this file
                     cursor.execute("""
@@ -150,12 +228,37 @@ def run(config):
                         # Update LastScan
                         cursor.execute("UPDATE MonitoredFiles SET LastScan = GETDATE() WHERE ID = ?", (file_id,))
                         conn.commit()
-                        logger.info(f"Created DELETED alert for {file_name}")
+                        logger.warning(f"File DELETED or not accessible: {full_path}. Created DELETED alert for {file_name}")
                     else:
-                        logger.info(f"DELETED alert already exists for {file_name}, skipping duplicate alert")
+                        logger.debug(f"DELETED alert already exists for {file_name}, skipping duplicate alert")
                     continue
 
-                current_hash = compute_file_hash(full_path)
+                hash_mode = (row.HashMode or 'FULL').upper()
+                # New fingerprint cache values, written through to the index after the commit
+                full_hash_cache = None
+                if hash_mode == 'SAMPLED':
+                    # Reuse the last full hash while the fingerprint is unchanged, and re-verify
+                    # with a full hash on the FullHashIntervalMinutes cadence
+                    fingerprint = compute_file_fingerprint(full_path, row.SampleBlockCount or 16)
+                    verify_due = (
+                        not row.LastFullHashDate
+                        or datetime.now() - row.LastFullHashDate >= timedelta(minutes=row.FullHashIntervalMinutes or 1440)
+                    )
+                    if fingerprint == row.LastFingerprint and row.LastFileHash and not verify_due:
+                        current_hash = row.LastFileHash
+                    else:
+                        current_hash = compute_file_hash(full_path)
+                        # Written with the scheduler's clock, the same one verify_due compares against
+                        full_hash_date = datetime.now()
+                        cursor.execute("""
+                            UPDATE MonitoredFiles
+                            SET LastFingerprint = ?, LastFileHash = ?, LastFullHashDate = ?
+                            WHERE ID = ?
+                        """, (fingerprint, current_hash, full_hash_date, file_id))
+                        full_hash_cache = (fingerprint, current_hash, full_hash_date)
+                else:
+                    current_hash = compute_file_hash(full_path)
+
                 file_size_bytes = os.path.getsize(full_path)
                 file_size_str = str(file_size_bytes)
                 mtime = os.path.getmtime(full_path)
@@ -163,6 +266,9 @@ def run(config):
 
                 # Check for modification (hash change only)
                 hash_changed = old_hash != current_hash
+                result = ('MODIFIED' if old_hash else 'CREATED') if hash_changed else 'UNCHANGED'
+                metrics.inc("orbitvc_monitor_files_total", module=METRICS_MODULE, result=result)
+                results[result] = results.get(result, 0) + 1
 
                 if hash_changed:
                     change_type = 'MODIFIED' if old_hash else 'CREATED'
@@ -194,8 +300,9 @@ def run(config):
 
                             dest_path = os.path.join(ver_folder, file_name)
                             shutil.copy2(full_path, dest_path)
+                            metrics.inc("orbitvc_smb_bytes_read_total", file_size_bytes, module=METRICS_MODULE)
                             new_stored_path = dest_path
-                            logger.info(f"Archived change history version {next_ver} to {new_stored_path}")
+                            logger.debug(f"Archived change history version {next_ver} to {new_stored_path}")
                         except Exception as e:
                             logger.error(f"Failed to archive file change history: {str(e)}")
 
@@ -216,19 +323,30 @@ def run(config):
                     """, (file_id,))
 
                     conn.commit()
+                    if index:
+                        index.note_change_history(file_id, next_ver)
+                        if full_hash_cache:
+                            index.note_full_hash(file_id, *full_hash_cache)
                     logger.info(f"Processed changes for {file_name} (Change History Version: {next_ver})")
 
                 else:
                     # No change - just update LastScan
                     cursor.execute("UPDATE MonitoredFiles SET LastScan = GETDATE() WHERE ID = ?", file_id)
                     conn.commit()
+                    if index and full_hash_cache:
+                        index.note_full_hash(file_id, *full_hash_cache)
 
             except Exception as e:
                 logger.error(f"Error processing file {file_name if 'file_name' in locals() else 'unknown'}: {e}")
+                metrics.inc("orbitvc_module_errors_total", module=METRICS_MODULE)
+                results['ERROR'] = results.get('ERROR', 0) + 1
 
     except Exception as e:
         logger.error(f"Database Error: {e}")
+        metrics.inc("orbitvc_module_errors_total", module=METRICS_MODULE)
     finally:
         if conn:
             conn.close()
-    logger.info("Version Control Monitor check completed.")
+    tally = ", ".join(f"{count} {name}" for name, count in sorted(results.items())) or "no files"
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(f"Version Control Monitor check completed: {tally} in {elapsed:.1f}s")
@@ -0,0 +1,293 @@
+"""
+Reproducible throughput benchmark for the scheduled modules.
+
+Runs ping_check.run and monitor_files.run against a synthetic fleet without SQL Server,
+Windows shares or real hosts:
+  - a local SQLite database (sqlite_standin.py) replaces the OrbitVC database,
+  - a generated file tree replaces the device shares,
+  - a fake prober replaces ICMP ping.
+
+Usage:
+    python benchmarks/run_benchmarks.py --devices 200 --files-per-device 5 --file-size-kb 512
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/<previous>.json
+
+Results are written as JSON to benchmarks/results/ so runs can be compared across versions.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(SCRIPTS_DIR)
+sys.path.append(BENCH_DIR)
+
+import metrics
+from sqlite_standin import StandInDatabase
+
+
+def load_module(name, relative_path):
+    # Same loading mechanism as main.run_module
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SyntheticFleet:
+    """Generated devices, IPs and monitored files, seeded into the stand-in database."""
+
+    def __init__(self, args, work_dir, db):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.db = db
+        self.files_dir = os.path.join(work_dir, "shares")
+        self.ip_paths = {}
+        self.unreachable_ips = set()
+        self.files = []
+
+    def build(self):
+        args = self.args
+        conn = self.db.connect()
+        cursor = conn.cursor()
+
+        cursor.execute("INSERT INTO ConnectionStatusTypes (ID, Name) VALUES (?, 'UP')", uuid.uuid4())
+        cursor.execute("INSERT INTO ConnectionStatusTypes (ID, Name) VALUES (?, 'DOWN')", uuid.uuid4())
+        ip_type_ids = [uuid.uuid4() for _ in range(args.ips_per_device)]
+        for i, type_id in enumerate(ip_type_ids):
+            cursor.execute("INSERT INTO IPAddressTypes (ID, Name) VALUES (?, ?)", (type_id, f"Network-{i + 1:02d}"))
+
+        payload = os.urandom(args.file_size_kb * 1024)
+        ip_counter = 0
+        for d in range(args.devices):
+            device_id = uuid.uuid4()
+            unreachable = self.rng.random() < args.unreachable_ratio
+
+            for type_id in ip_type_ids:
+                ip_counter += 1
+                ip = f"10.{(ip_counter >> 16) & 255}.{(ip_counter >> 8) & 255}.{ip_counter & 255}"
+                cursor.execute(
+                    "INSERT INTO DeviceIPAddresses (ID, DeviceID, IPAddressTypeID, IPAddress) VALUES (?, ?, ?, ?)",
+                    (uuid.uuid4(), device_id, type_id, ip))
+                if unreachable:
+                    self.unreachable_ips.add(ip)
+
+            device_dir = os.path.join(self.files_dir, f"device-{d:06d}")
+            os.makedirs(device_dir, exist_ok=True)
+            for f in range(args.files_per_device):
+                file_id = uuid.uuid4()
+                file_name = f"file-{f:04d}.bin"
+                path = os.path.join(device_dir, file_name)
+                with open(path, "wb") as fh:
+                    fh.write(payload)
+                    fh.write(file_id.bytes)
+                with open(path, "rb") as fh:
+                    file_hash = hashlib.sha256(fh.read()).hexdigest()
+
+                cursor.execute("INSERT INTO MonitoredFiles (ID, DeviceID, HashMode) VALUES (?, ?, ?)",
+                               (file_id, device_id, args.hash_mode))
+                cursor.execute("""
+                    INSERT INTO MonitoredFileVersions
+                    (ID, MonitoredFileID, VersionNo, FileDateModified, FileSize, FileHash, AbsoluteDirectory, FileName, ParentDirectory)
+                    VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+                """, (uuid.uuid4(), file_id, datetime.now(), str(os.path.getsize(path)), file_hash, path, file_name, device_dir))
+                self.files.append(path)
+
+        conn.commit()
+        conn.close()
+
+    def mutate(self):
+        """Rewrites the head of a change_rate fraction of the files."""
+        changed = 0
+        for path in self.files:
+            if self.rng.random() < self.args.change_rate:
+                with open(path, "r+b") as fh:
+                    fh.write(os.urandom(64))
+                changed += 1
+        return changed
+
+    def fake_ping_rtt(self, host):
+        if self.args.ping_latency_ms:
+            time.sleep(self.args.ping_latency_ms / 1000.0)
+        if host in self.unreachable_ips:
+            return False, None
+        return True, self.rng.uniform(0.0005, 0.005)
+
+    def fake_unc_path(self, ip, full_path_on_device):
+        # Files of unreachable devices resolve to a path that does not exist
+        if ip in self.unreachable_ips:
+            return full_path_on_device + ".unreachable"
+        return full_path_on_device
+
+
+def counter_snapshot():
+    snapshot = {}
+    for module in ("PingCheck", "MonitorVersionControl"):
+        for name, value in metrics.REGISTRY.counter_values(module=module).items():
+            snapshot[(module, name)] = value
+    # orbitvc_files_hashed_total counts full hashes and sampled fingerprints; keep them apart
+    for kind in ("full", "sampled"):
+        values = metrics.REGISTRY.counter_values(module="MonitorVersionControl", kind=kind)
+        snapshot[("MonitorVersionControl", f"orbitvc_files_hashed_total:{kind}")] = values.get("orbitvc_files_hashed_total", 0)
+    return snapshot
+
+
+def counter_delta(before, after, module, name):
+    return after.get((module, name), 0) - before.get((module, name), 0)
+
+
+def bench_ping(ping_check, config, fleet, iterations, db):
+    ping_check.connect_db = lambda cfg: db.connect()
+    ping_check.ping_rtt = fleet.fake_ping_rtt
+
+    before = counter_snapshot()
+    trips_before = db.round_trips
+    start = time.perf_counter()
+    for _ in range(iterations):
+        ping_check.run(config)
+    elapsed = time.perf_counter() - start
+    after = counter_snapshot()
+
+    hosts = counter_delta(before, after, "PingCheck", "orbitvc_ping_checks_total")
+    return {
+        "iterations": iterations,
+        "seconds": round(elapsed, 4),
+        "runs_per_second": round(iterations / elapsed, 3),
+        "hosts_per_second": round(hosts / elapsed, 1),
+        "db_round_trips_per_run": round((db.round_trips - trips_before) / iterations, 1),
+    }
+
+
+def bench_monitor(monitor_files, config, fleet, iterations, db):
+    monitor_files.get_db_connection = lambda cfg: db.connect()
+    monitor_files.construct_unc_path = fleet.fake_unc_path
+
+    before = counter_snapshot()
+    trips_before = db.round_trips
+    changed = 0
+    elapsed = 0.0
+    for _ in range(iterations):
+        changed += fleet.mutate()
+        start = time.perf_counter()
+        monitor_files.run(config)
+        elapsed += time.perf_counter() - start
+    after = counter_snapshot()
+
+    module = "MonitorVersionControl"
+    full_hashes = counter_delta(before, after, module, "orbitvc_files_hashed_total:full")
+    fingerprints = counter_delta(before, after, module, "orbitvc_files_hashed_total:sampled")
+    bytes_read = counter_delta(before, after, module, "orbitvc_smb_bytes_read_total")
+    return {
+        "iterations": iterations,
+        "seconds": round(elapsed, 4),
+        "runs_per_second": round(iterations / elapsed, 3),
+        "full_hashes_per_second": round(full_hashes / elapsed, 1),
+        "sampled_fingerprints_per_second": round(fingerprints / elapsed, 1),
+        "mb_per_second": round(bytes_read / (1024 * 1024) / elapsed, 2),
+        "files_changed": changed,
+        "db_round_trips_per_run": round((db.round_trips - trips_before) / iterations, 1),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('label')}):")
+    for bench, values in results["results"].items():
+        base_values = baseline.get("results", {}).get(bench, {})
+        for key, value in values.items():
+            base = base_values.get(key)
+            if not isinstance(value, (int, float)) or not base or key in ("iterations", "files_changed"):
+                continue
+            change = (value - base) / base * 100
+            print(f"  {bench}.{key}: {base} -> {value} ({change:+.1f}%)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ping_check and monitor_files against a synthetic fleet.")
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--ips-per-device", type=int, default=2)
+    parser.add_argument("--files-per-device", type=int, default=5)
+    parser.add_argument("--file-size-kb", type=int, default=256)
+    parser.add_argument("--change-rate", type=float, default=0.05, help="Fraction of files modified before each monitor run")
+    parser.add_argument("--unreachable-ratio", type=float, default=0.1, help="Fraction of devices whose IPs do not respond")
+    parser.add_argument("--ping-latency-ms", type=float, default=0.0, help="Simulated latency of each fake ping")
+    parser.add_argument("--hash-mode", choices=["FULL", "SAMPLED"], default="FULL")
+    parser.add_argument("--state-index", action="store_true", help="Run the modules with the resident state index enabled")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default="", help="Version label stored in the result file")
+    parser.add_argument("--output-dir", default=os.path.join(BENCH_DIR, "results"))
+    parser.add_argument("--baseline", help="Previous result file to compare against")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--keep-work-dir", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+
+    work_dir = tempfile.mkdtemp(prefix="orbitvc-bench-")
+    try:
+        db = StandInDatabase(os.path.join(work_dir, "orbitvc.sqlite"))
+        fleet = SyntheticFleet(args, work_dir, db)
+
+        setup_start = time.perf_counter()
+        fleet.build()
+        setup_seconds = time.perf_counter() - setup_start
+
+        config = {
+            "stored_files_path": os.path.join(work_dir, "Resources"),
+            "state_index": {"enabled": args.state_index},
+        }
+        ping_check = load_module("PingCheck", os.path.join("01_Ping_DeviceIPAddress", "ping_check.py"))
+        monitor_files = load_module("MonitorVersionControl", os.path.join("02_Monitor_VersionControl", "monitor_files.py"))
+
+        results = {
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output_dir", "baseline", "keep_work_dir", "log_level")},
+            "setup_seconds": round(setup_seconds, 3),
+            "results": {
+                "ping_check": bench_ping(ping_check, config, fleet, args.iterations, db),
+                "monitor_files": bench_monitor(monitor_files, config, fleet, args.iterations, db),
+            },
+        }
+    finally:
+        if args.keep_work_dir:
+            print(f"Work directory kept at {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    # Microseconds and a hash of the parameters keep back-to-back runs from overwriting each other
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    params_hash = hashlib.sha1(json.dumps(results["params"], sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    out_name = f"{args.label + '_' if args.label else ''}{stamp}_{params_hash}.json"
+    out_path = os.path.join(args.output_dir, out_name)
+    with open(out_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results["results"], indent=2))
+    print(f"Results written to {out_path}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
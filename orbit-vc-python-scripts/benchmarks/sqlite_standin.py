@@ -0,0 +1,197 @@
+import re
+import sqlite3
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+# Subset of DataScript/01_CreateTables.sql used by ping_check and monitor_files.
+# uniqueidentifier columns are stored as TEXT, datetime columns as ISO strings
+# (ModifiedDate defaults to local time in the same format GETDATE() returns here).
+SCHEMA = """
+CREATE TABLE ConnectionStatusTypes (
+    ID TEXT PRIMARY KEY,
+    Name TEXT NOT NULL,
+    IsDeleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IPAddressTypes (
+    ID TEXT PRIMARY KEY,
+    Name TEXT NOT NULL
+);
+CREATE TABLE DeviceIPAddresses (
+    ID TEXT PRIMARY KEY,
+    DeviceID TEXT NOT NULL,
+    IPAddressTypeID TEXT NULL,
+    IPAddress TEXT NOT NULL,
+    IsDeleted INTEGER NOT NULL DEFAULT 0,
+    ModifiedDate DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE INDEX IX_DeviceIPAddresses_DeviceID ON DeviceIPAddresses(DeviceID);
+CREATE TABLE DeviceIPAddressConnectionStatus (
+    ID TEXT PRIMARY KEY,
+    DeviceIPAddressID TEXT NOT NULL,
+    ConnectionStatusTypeID TEXT NULL,
+    IsDeleted INTEGER NOT NULL DEFAULT 0,
+    LastCheckedDate DATETIME NULL
+);
+CREATE INDEX IX_DeviceIPAddressConnectionStatus_DeviceIPAddressID ON DeviceIPAddressConnectionStatus(DeviceIPAddressID);
+CREATE TABLE MonitoredFiles (
+    ID TEXT PRIMARY KEY,
+    DeviceID TEXT NOT NULL,
+    LastScan DATETIME NULL,
+    IsDeleted INTEGER NOT NULL DEFAULT 0,
+    CreatedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    HashMode TEXT NOT NULL DEFAULT 'FULL',
+    SampleBlockCount INTEGER NOT NULL DEFAULT 16,
+    FullHashIntervalMinutes INTEGER NOT NULL DEFAULT 1440,
+    LastFingerprint TEXT NULL,
+    LastFileHash TEXT NULL,
+    LastFullHashDate DATETIME NULL,
+    ModifiedDate DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE TABLE MonitoredFileVersions (
+    ID TEXT PRIMARY KEY,
+    MonitoredFileID TEXT NOT NULL,
+    VersionNo INTEGER NOT NULL,
+    FileDateModified DATETIME NOT NULL,
+    FileSize TEXT NULL,
+    FileHash TEXT NULL,
+    DetectedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    StoredDirectory TEXT NOT NULL DEFAULT '',
+    AbsoluteDirectory TEXT NOT NULL,
+    FileName TEXT NOT NULL,
+    ParentDirectory TEXT NOT NULL,
+    IsDeleted INTEGER NOT NULL DEFAULT 0,
+    CreatedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ModifiedDate DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE INDEX IX_MonitoredFileVersions_MonitoredFileID ON MonitoredFileVersions(MonitoredFileID, VersionNo);
+CREATE TABLE MonitoredFileAlerts (
+    ID TEXT PRIMARY KEY,
+    MonitoredFileID TEXT NOT NULL,
+    AlertType TEXT NOT NULL,
+    Message TEXT NOT NULL,
+    IsAcknowledged INTEGER NOT NULL DEFAULT 0,
+    IsCleared INTEGER NOT NULL DEFAULT 0,
+    CreatedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IX_MonitoredFileAlerts_MonitoredFileID ON MonitoredFileAlerts(MonitoredFileID);
+CREATE TABLE MonitoredFileChangeHistory (
+    ID TEXT PRIMARY KEY,
+    MonitoredFileID TEXT NOT NULL,
+    MonitoredFileVersionID TEXT NOT NULL,
+    VersionNo INTEGER NOT NULL,
+    FileDateModified DATETIME NOT NULL,
+    FileSize TEXT NULL,
+    FileHash TEXT NULL,
+    DetectedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    StoredDirectory TEXT NOT NULL DEFAULT '',
+    IsDeleted INTEGER NOT NULL DEFAULT 0,
+    CreatedDate DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IX_MonitoredFileChangeHistory_MonitoredFileID ON MonitoredFileChangeHistory(MonitoredFileID, VersionNo);
+"""
+
+
+# T-SQL functions that SQLite spells differently (ISNULL is an operator keyword in SQLite).
+# A bare GETDATE() column is typed through PARSE_COLNAMES so it comes back as a datetime.
+_TSQL_REWRITES = [
+    (re.compile(r"\bISNULL\s*\(", re.IGNORECASE), "IFNULL("),
+    (re.compile(r"\bGETDATE\(\)\s+AS\s+(\w+)", re.IGNORECASE), r'GETDATE() AS "\1 [DATETIME]"'),
+]
+
+
+def _translate(sql):
+    for pattern, replacement in _TSQL_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _getdate():
+    return datetime.now().isoformat(sep=" ", timespec="milliseconds")
+
+
+def _adapt(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="milliseconds")
+    return value
+
+
+def _convert_datetime(raw):
+    return datetime.fromisoformat(raw.decode())
+
+
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+
+class StandInCursor:
+    """
+    pyodbc-like cursor over sqlite3: rows support attribute access (row.ID), a single
+    non-sequence parameter is accepted like pyodbc does, UUID/datetime parameters
+    are adapted to the TEXT storage used by the schema above, and the few T-SQL
+    functions the modules use are translated.
+    """
+
+    _row_types = {}
+
+    def __init__(self, database, cursor):
+        self._database = database
+        self._cursor = cursor
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (tuple, list)):
+            params = params[0]
+        self._database.round_trips += 1
+        self._cursor.execute(_translate(sql), [_adapt(p) for p in params])
+        return self
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _row(self, values):
+        columns = tuple(col[0] for col in self._cursor.description)
+        row_type = self._row_types.get(columns)
+        if row_type is None:
+            row_type = self._row_types[columns] = namedtuple("Row", columns, rename=True)
+        return row_type(*values)
+
+    def fetchone(self):
+        values = self._cursor.fetchone()
+        return None if values is None else self._row(values)
+
+    def fetchall(self):
+        return [self._row(values) for values in self._cursor.fetchall()]
+
+
+class StandInConnection:
+    def __init__(self, database):
+        self._database = database
+        self._conn = sqlite3.connect(database.path, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self._conn.create_function("GETDATE", 0, _getdate)
+
+    def cursor(self):
+        return StandInCursor(self._database, self._conn.cursor())
+
+    def commit(self):
+        self._database.round_trips += 1
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class StandInDatabase:
+    """Local SQLite file standing in for the OrbitVC SQL Server database."""
+
+    def __init__(self, path):
+        self.path = path
+        self.round_trips = 0
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        conn.commit()
+        conn.close()
+
+    def connect(self, config=None):
+        return StandInConnection(self)
@@ -1,40 +1,154 @@
 
+import atexit
+import glob
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 
-def setup_logger(log_dir, level="INFO"):
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Background writer used when async logging is enabled
+_listener = None
+_queue = None
+
+
+class DailyRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    Writes to log_<YYYY-MM-DD>.txt and switches to a new file when the date changes,
+    so a long-running main.py no longer writes to the start date's file forever.
+    With max_bytes set, a day's file is also rolled by size into log_<date>.1.txt, .2, ...
+    Daily files older than retention_days are removed on rollover (0 keeps everything).
+    """
+
+    def __init__(self, log_dir, max_bytes=0, backup_count=5, retention_days=0):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.current_date = datetime.now().date()
+        super().__init__(self._path_for(self.current_date), mode='a', encoding='utf-8', delay=False)
+
+    def _path_for(self, date):
+        return os.path.join(self.log_dir, date.strftime("log_%Y-%m-%d.txt"))
+
+    def shouldRollover(self, record):
+        if datetime.now().date() != self.current_date:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            msg = f"{self.format(record)}\n"
+            if self.stream.tell() + len(msg) >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        today = datetime.now().date()
+        if today != self.current_date:
+            self.current_date = today
+            self.baseFilename = os.path.abspath(self._path_for(today))
+            self._prune_old_days()
+        elif self.backup_count > 0:
+            root, ext = os.path.splitext(self.baseFilename)
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{root}.{i}{ext}"
+                dst = f"{root}.{i + 1}{ext}"
+                if os.path.exists(src):
+                    os.replace(src, dst)
+            os.replace(self.baseFilename, f"{root}.1{ext}")
+        else:
+            # No backups kept: start the day's file over
+            os.remove(self.baseFilename)
+
+        self.stream = self._open()
+
+    def _prune_old_days(self):
+        if self.retention_days <= 0:
+            return
+        cutoff = datetime.now().timestamp() - self.retention_days * 86400
+        for path in glob.glob(os.path.join(self.log_dir, "log_*.txt")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def setup_logger(log_dir, level="INFO", options=None):
+    """
+    Configures the root logger.
+
+    options (the "logging" section of config.json):
+        async          - route records through a queue to a background writer thread (default True)
+        max_bytes      - roll a day's file by size as well (0 = daily only)
+        backup_count   - size-rolled backups kept per day
+        retention_days - delete daily files older than this (0 = keep all)
+        levels         - per-logger levels, e.g. {"PingCheck": "DEBUG"} for per-host detail
+    """
+    global _listener, _queue
+    options = options or {}
+
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    # Use today's date for the log file
-    log_filename = datetime.now().strftime("log_%Y-%m-%d.txt")
-    log_path = os.path.join(log_dir, log_filename)
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
 
-    logging.basicConfig(
-        filename=log_path,
-        level=getattr(logging, level.upper(), logging.INFO),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
+    file_handler = DailyRotatingFileHandler(
+        log_dir,
+        max_bytes=options.get('max_bytes', 0),
+        backup_count=options.get('backup_count', 5),
+        retention_days=options.get('retention_days', 0),
     )
+    file_handler.setFormatter(formatter)
 
-    logger = logging.getLogger()
-    
     # Add console handler as well so we can see output
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, level.upper(), logging.INFO))
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(formatter)
-    
+
+    logger = logging.getLogger()
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+
     # Remove existing handlers to avoid duplicates if re-initialized
+    shutdown_logging()
     if logger.hasHandlers():
         logger.handlers.clear()
-        
-    logger.addHandler(console_handler)
-    # Add file handler back since clear() removed it (basicConfig adds it to root)
-    file_handler = logging.FileHandler(log_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
+
+    if options.get('async', True):
+        # Callers only enqueue; file and console I/O happen on the listener thread
+        _queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(_queue))
+        _listener = logging.handlers.QueueListener(_queue, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+
+    for name, name_level in options.get('levels', {}).items():
+        logging.getLogger(name).setLevel(getattr(logging, name_level.upper(), logging.INFO))
 
     return logger
+
+
+def queue_depth():
+    """Number of records waiting for the background writer (0 when logging is synchronous)."""
+    return _queue.qsize() if _queue is not None else 0
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the background writer."""
+    global _listener, _queue
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue = None
+
+
+atexit.register(shutdown_logging)
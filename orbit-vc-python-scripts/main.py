@@ -10,12 +10,20 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from logger_setup import setup_logger
+    from logger_setup import setup_logger, shutdown_logging, queue_depth
 except ImportError:
     import logging
-    def setup_logger(log_dir, level):
+    def setup_logger(log_dir, level, options=None):
         logging.basicConfig(level=logging.INFO)
         return logging.getLogger()
+    def shutdown_logging():
+        pass
+    def queue_depth():
+        return 0
+
+from partitioning import ClusterMembership
+import metrics
+from profiling import ProfileManager
 
 CONFIG_FILE = 'config.json'
 
@@ -27,11 +35,18 @@ def load_config():
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def run_module(module_config, logger, global_config):
+def run_module(module_config, logger, global_config, profiler=None):
     name = module_config.get('name')
     path = module_config.get('module_path')
+
+    def invoke(run):
+        if profiler:
+            profiler.call(name, module_config, run, global_config)
+        else:
+            run(global_config)
     
     logger.info(f"Checking module: {name}")
+    summary = metrics.RunSummary(name)
     
     try:
         # Resolve path 01_Ping... -> 01_Ping.../ping_check.py
@@ -47,11 +62,13 @@ def run_module(module_config, logger, global_config):
                  spec.loader.exec_module(module)
                  if hasattr(module, 'run'):
                      logger.info(f"Running module function: {name}")
-                     module.run(global_config)
+                     invoke(module.run)
                  else:
                      logger.error(f"Module {name} has no 'run' function")
+                     summary.fail("Module has no 'run' function")
             else:
                  logger.error(f"Module file not found: {file_path}")
+                 summary.fail(f"Module file not found: {file_path}")
                  
         else:
             # Direct file path
@@ -60,14 +77,27 @@ def run_module(module_config, logger, global_config):
                 module = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(module)
                 if hasattr(module, 'run'):
-                    module.run(global_config)
+                    invoke(module.run)
                 else:
                     logger.error(f"Module {name} has no 'run' function")
+                    summary.fail("Module has no 'run' function")
             else:
                 logger.error(f"Module file not found: {path}")
+                summary.fail(f"Module file not found: {path}")
 
     except Exception as e:
         logger.error(f"Failed to run module {name}: {e}")
+        summary.fail(e)
+
+    record = summary.finish()
+    logger.info(f"Run summary: {json.dumps(record)}")
+    summary_file = global_config.get('metrics', {}).get('run_summary_file')
+    if summary_file:
+        log_dir = global_config.get('logging', {}).get('directory', './Logs')
+        try:
+            metrics.write_run_summary(record, os.path.join(log_dir, summary_file))
+        except Exception as e:
+            logger.error(f"Failed to write run summary: {e}")
 
 def main():
     config = load_config()
@@ -76,12 +106,23 @@ def main():
 
     log_dir = config.get('logging', {}).get('directory', './Logs')
     log_level = config.get('logging', {}).get('level', 'INFO')
-    logger = setup_logger(log_dir, log_level)
+    logger = setup_logger(log_dir, log_level, config.get('logging', {}))
     
     logger.info("Main Service Started")
+    metrics.setup_metrics(config, log_dir)
+
+    profiler = ProfileManager(config, log_dir)
+    profiler.install_signal_handler()
     
     modules = config.get('modules', [])
     last_runs = {}
+
+    # Partition devices across scheduler nodes when more than one main.py instance runs
+    membership = None
+    if config.get('cluster', {}).get('enabled'):
+        membership = ClusterMembership(config)
+        membership.start()
+        logger.info(f"Cluster mode enabled. Node ID: {membership.node_id}")
     
     # Run immediately on start
     logger.info("Performing initial run...")
@@ -92,6 +133,11 @@ def main():
             # For simplicity, we just reload config object inside loop or restart script
             
             current_time = datetime.now()
+
+            # Modules check ownership against the live membership (renewed by its own thread)
+            run_config = config
+            if membership:
+                run_config = dict(config, partition=membership)
             
             for mod in modules:
                 if not mod.get('enabled'):
@@ -109,14 +155,19 @@ def main():
                         should_run = True
                 
                 if should_run:
-                    run_module(mod, logger, config)
+                    run_module(mod, logger, run_config, profiler)
                     last_runs[name] = current_time
+
+            metrics.set_gauge("orbitvc_log_queue_depth", queue_depth())
             
             check_interval = config.get('scheduler', {}).get('check_interval_seconds', 10)
             time.sleep(check_interval)
             
         except KeyboardInterrupt:
             logger.info("Stopping...")
+            if membership:
+                membership.leave()
+            shutdown_logging()
             break
         except Exception as e:
             logger.error(f"Main Loop Error: {e}")
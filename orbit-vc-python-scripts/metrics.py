@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("Metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    """
+    In-process metrics store (counters, gauges, histograms) keyed by name and labels.
+    Rendered in Prometheus text format for the HTTP endpoint and the metrics file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(buckets)
+            hist.observe(value)
+
+    def counter_values(self, **match):
+        """Returns {name: total} for counters whose labels include all of `match`."""
+        wanted = {(k, str(v)) for k, v in match.items()}
+        totals = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                if wanted.issubset(labels):
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        def emit_header(name, kind, seen):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        seen = set()
+        for (name, labels), value in counters:
+            emit_header(name, "counter", seen)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            emit_header(name, "gauge", seen)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), hist in histograms:
+            emit_header(name, "histogram", seen)
+            # Bucket counts are already cumulative (observe() increments every bucket >= value)
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# Process-wide registry shared by main.py and the scheduled modules
+REGISTRY = Registry()
+
+describe = REGISTRY.describe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+observe = REGISTRY.observe
+render = REGISTRY.render
+
+
+@contextmanager
+def timer(name, **labels):
+    """Observes the duration of the with-block (seconds) into histogram `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+class CountingCursor:
+    """
+    Wraps a DB-API cursor and counts execute() calls as DB round trips.
+    Every other attribute is passed through to the real cursor.
+    """
+
+    def __init__(self, cursor, module):
+        self._cursor = cursor
+        self._module = module
+
+    def execute(self, *args, **kwargs):
+        inc("orbitvc_db_round_trips_total", module=self._module)
+        with timer("orbitvc_db_query_seconds", module=self._module):
+            return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrape requests out of the service log
+        pass
+
+
+def start_http_server(host="127.0.0.1", port=9105):
+    """Serves /metrics in Prometheus text format from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
+
+
+def write_metrics_file(path):
+    """Writes the current metrics atomically so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def start_file_writer(path, interval_seconds=60):
+    """Rewrites the metrics file every interval_seconds from a daemon thread."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    def loop():
+        while True:
+            try:
+                write_metrics_file(path)
+            except Exception as e:
+                logger.error(f"Failed to write metrics file {path}: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def setup_metrics(config, log_dir):
+    """Starts the exporters enabled in the 'metrics' config section."""
+    metrics_cfg = config.get('metrics', {})
+    if not metrics_cfg.get('enabled', True):
+        return
+
+    http_port = metrics_cfg.get('http_port')
+    if http_port:
+        try:
+            start_http_server(metrics_cfg.get('http_host', '127.0.0.1'), http_port)
+        except Exception as e:
+            logger.error(f"Failed to start metrics endpoint on port {http_port}: {e}")
+
+    metrics_file = metrics_cfg.get('file')
+    if metrics_file:
+        if not os.path.isabs(metrics_file):
+            metrics_file = os.path.join(log_dir, metrics_file)
+        start_file_writer(metrics_file, metrics_cfg.get('file_interval_seconds', 60))
+
+
+# ---------------------------------------------------------------------------
+# Per-run summary
+# ---------------------------------------------------------------------------
+
+class RunSummary:
+    """
+    Structured record of one module run: timing, status and the change in every
+    counter labelled with the module name (DB round trips, files hashed, bytes read, ...).
+    Modules catch their own exceptions, so a run that raised orbitvc_module_errors_total
+    is reported as an error even when run() returned normally.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._baseline = REGISTRY.counter_values(module=module)
+        self.status = "ok"
+        self.error = None
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = str(error)
+
+    def finish(self):
+        duration = time.perf_counter() - self._start
+
+        current = REGISTRY.counter_values(module=self.module)
+        counters = {}
+        for name, value in current.items():
+            delta = value - self._baseline.get(name, 0)
+            if delta and name != "orbitvc_module_runs_total":
+                counters[name] = delta
+
+        errors = counters.get("orbitvc_module_errors_total", 0)
+        if errors and self.status == "ok":
+            self.fail(f"{errors:g} error(s) reported by the module")
+
+        observe("orbitvc_module_run_seconds", duration, module=self.module)
+        inc("orbitvc_module_runs_total", module=self.module, status=self.status)
+        set_gauge("orbitvc_module_last_run_seconds", round(duration, 6), module=self.module)
+        set_gauge("orbitvc_module_last_run_timestamp", time.time(), module=self.module)
+
+        record = {
+            "module": self.module,
+            "started": self.started.isoformat(timespec="seconds"),
+            "duration_seconds": round(duration, 3),
+            "status": self.status,
+            "counters": counters,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+def write_run_summary(record, path):
+    """Appends one JSON line per module run."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+describe("orbitvc_module_run_seconds", "Duration of scheduled module runs.")
+describe("orbitvc_module_runs_total", "Scheduled module runs by status.")
+describe("orbitvc_db_round_trips_total", "Database statements executed.")
+describe("orbitvc_db_query_seconds", "Duration of database statements.")
+describe("orbitvc_ping_rtt_seconds", "ICMP round-trip time of reachable hosts.")
+describe("orbitvc_ping_checks_total", "Ping checks by result.")
+describe("orbitvc_files_hashed_total", "Files hashed by the version control monitor.")
+describe("orbitvc_file_hash_seconds", "Time spent hashing one monitored file.")
+describe("orbitvc_smb_bytes_read_total", "Bytes read from monitored files.")
+describe("orbitvc_monitor_files_total", "Monitored file checks by result.")
+describe("orbitvc_module_errors_total", "Errors caught inside scheduled modules.")
+describe("orbitvc_log_queue_depth", "Log records waiting for the background log writer.")
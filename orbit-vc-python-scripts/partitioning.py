@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("Partitioning")
+
+
+def get_db_connection(config):
+    import pyodbc
+    db_config = config['database']
+    conn_str = (
+        f"DRIVER={db_config['driver']};"
+        f"SERVER={db_config['server']};"
+        f"DATABASE={db_config['database']};"
+        f"UID={db_config['uid']};"
+        f"PWD={db_config['pwd']};"
+        f"TrustServerCertificate={db_config.get('trust_server_certificate', 'yes')};"
+    )
+    return pyodbc.connect(conn_str)
+
+
+def _weight(node_id, key):
+    digest = hashlib.sha1(f"{node_id}|{key}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def owner_of(key, nodes):
+    """
+    Rendezvous (highest random weight) hashing.
+    Returns the node that owns the key. When a node joins or leaves, only the keys
+    owned by that node move, so the rest of the fleet keeps its assignment.
+    """
+    if not nodes:
+        return None
+    key = str(key).lower()
+    return max(nodes, key=lambda node_id: _weight(node_id, key))
+
+
+def owns(config, device_id):
+    """
+    Returns True if this scheduler node should process the given device.
+    Without a 'partition' entry (standalone run, or cluster disabled) every device is owned.
+    config['partition'] is the node's ClusterMembership, which is kept current by its
+    heartbeat thread, so ownership is re-evaluated while a module run is in progress.
+    """
+    partition = config.get('partition')
+    if partition is None:
+        return True
+    return partition.owns(device_id)
+
+
+def lease_lost(config):
+    """Returns True when this node runs in cluster mode and no longer holds a valid lease."""
+    partition = config.get('partition')
+    return partition is not None and not partition.lease_active()
+
+
+class ClusterMembership:
+    """
+    Tracks the live scheduler nodes using lease rows in [SchedulerNodes].
+    Each node refreshes its own LastHeartbeat from a background thread; nodes whose
+    heartbeat is older than lease_seconds are considered dead and drop out of the
+    device assignment.
+
+    The lease is renewed independently of module runs, so a slow run does not let the
+    other nodes take over this node's devices. If renewals fail for lease_seconds the
+    lease is treated as lost and owns() returns False until a renewal succeeds again.
+
+    A node that joins (or rejoins after its lease lapsed) only enters the assignment once
+    its StartedDate is join_grace_seconds old by the DB clock. Every node, the joining one
+    included, evaluates that moment the same way, and join_grace_seconds is at least
+    heartbeat_seconds, so the existing nodes have seen the new row before it takes effect
+    and they hand devices over at the moment the new node claims them.
+    """
+
+    def __init__(self, config):
+        cluster_cfg = config.get('cluster', {})
+        self.config = config
+        self.node_id = cluster_cfg.get('node_id') or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = cluster_cfg.get('lease_seconds', 60)
+        self.heartbeat_seconds = cluster_cfg.get('heartbeat_seconds', max(1, self.lease_seconds // 3))
+        self.join_grace_seconds = max(
+            cluster_cfg.get('join_grace_seconds', 2 * self.heartbeat_seconds), self.heartbeat_seconds)
+        self.nodes = []
+        # NodeID -> time.monotonic() from which the node counts in the device assignment
+        self.eligible_at = {}
+        # time.monotonic() until which the last successful renewal keeps this node's lease valid
+        self.lease_expires = 0.0
+        self._expiry_reported = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Renews the lease once, then keeps renewing it every heartbeat_seconds on a daemon thread."""
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name="ClusterHeartbeat", daemon=True)
+        self._thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            self.heartbeat()
+
+    def heartbeat(self):
+        """Renews this node's lease and reloads the live node list."""
+        # Measured before the UPDATE so the local expiry is never later than the one other nodes see
+        sent = time.monotonic()
+
+        conn = None
+        try:
+            conn = get_db_connection(self.config)
+            cursor = conn.cursor()
+
+            cursor.execute("UPDATE SchedulerNodes SET LastHeartbeat = GETDATE() WHERE NodeID = ?", self.node_id)
+            if cursor.rowcount == 0:
+                if self.lease_expires:
+                    logger.warning(f"Lease of node {self.node_id} had expired on the other nodes; rejoining")
+                cursor.execute("""
+                    INSERT INTO SchedulerNodes (NodeID, HostName, StartedDate, LastHeartbeat)
+                    VALUES (?, ?, GETDATE(), GETDATE())
+                """, (self.node_id, socket.gethostname()))
+
+            # Expired leases are removed so dead nodes don't linger in the table
+            cursor.execute("""
+                DELETE FROM SchedulerNodes
+                WHERE LastHeartbeat < DATEADD(second, ?, GETDATE())
+            """, -self.lease_seconds)
+
+            cursor.execute("""
+                SELECT NodeID, DATEDIFF(second, StartedDate, GETDATE()) AS AgeSeconds
+                FROM SchedulerNodes
+                ORDER BY NodeID
+            """)
+            rows = cursor.fetchall()
+            received = time.monotonic()
+            conn.commit()
+
+            # The DB measured each age somewhere between sent and received. Other nodes are
+            # counted from the earliest bound (hand devices over early) and this node from the
+            # latest (claim late), so two nodes never own a device at the same time.
+            eligible_at = {}
+            for row in rows:
+                remaining = max(0, self.join_grace_seconds - (row.AgeSeconds or 0))
+                base = received if row.NodeID == self.node_id else sent
+                eligible_at[row.NodeID] = base + remaining
+            nodes = sorted(eligible_at)
+
+            with self._lock:
+                if nodes != self.nodes:
+                    joining = [n for n, at in eligible_at.items() if at > received]
+                    suffix = f", joining after grace period: {joining}" if joining else ""
+                    logger.info(f"Cluster membership changed: {len(nodes)} node(s) {nodes}{suffix}")
+                self.nodes = nodes
+                self.eligible_at = eligible_at
+                self.lease_expires = sent + self.lease_seconds
+            self._expiry_reported = False
+        except Exception as e:
+            # The last membership is kept only while the lease is still valid; after that the
+            # other nodes evict this one and owns() stops claiming devices.
+            logger.error(f"Cluster heartbeat failed for node {self.node_id}: {e}")
+            if self.lease_expires and not self.lease_active() and not self._expiry_reported:
+                logger.warning(f"Lease of node {self.node_id} expired; not processing devices until it is renewed")
+                self._expiry_reported = True
+        finally:
+            if conn:
+                conn.close()
+
+    def lease_active(self):
+        return time.monotonic() < self.lease_expires
+
+    def active_nodes(self):
+        """Nodes that currently count in the device assignment (past their join grace period)."""
+        now = time.monotonic()
+        return [node_id for node_id, at in self.eligible_at.items() if at <= now]
+
+    def owns(self, device_id):
+        with self._lock:
+            if not self.lease_active():
+                return False
+            return owner_of(device_id, self.active_nodes()) == self.node_id
+
+    def leave(self):
+        """Stops the heartbeat and releases this node's lease so the remaining nodes rebalance immediately."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self.lease_expires = 0.0
+
+        conn = None
+        try:
+            conn = get_db_connection(self.config)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM SchedulerNodes WHERE NodeID = ?", self.node_id)
+            conn.commit()
+            logger.info(f"Node {self.node_id} left the cluster")
+        except Exception as e:
+            logger.error(f"Failed to release lease for node {self.node_id}: {e}")
+        finally:
+            if conn:
+                conn.close()
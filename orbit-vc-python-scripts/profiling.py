@@ -0,0 +1,169 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import time
+from datetime import datetime
+
+logger = logging.getLogger("Profiling")
+
+# Flag file dropped into the log directory to profile the next run of every module.
+# A module-specific flag is named profile_<ModuleName>.flag.
+DEFAULT_FLAG_FILE = "profile.flag"
+
+
+def _load_sampling_profiler():
+    try:
+        from pyinstrument import Profiler
+        return Profiler
+    except ImportError:
+        return None
+
+
+class ProfileManager:
+    """
+    Opt-in profiling of scheduled module runs.
+
+    A run is profiled when:
+      - the flag file (or the module's own flag file) exists in the log directory,
+      - SIGUSR1 was received (POSIX only),
+      - the previous run of the module exceeded threshold_seconds, or
+      - always_profile is set (the dump is then kept only for runs over the threshold).
+
+    Dumps are written to <log_dir>/<directory>/<Module>_<timestamp>.prof (cProfile, open with
+    pstats/snakeviz) or .txt (pyinstrument), and the hottest functions are written to the log.
+    """
+
+    def __init__(self, config, log_dir):
+        self.config = config.get('profiling', {})
+        self.log_dir = log_dir
+        self.armed = set()
+        # Time of the last "profile everything" request, and of each module's last profiled run
+        self.arm_all_at = None
+        self.last_profiled = {}
+
+    def settings(self, module_config):
+        # Module-level "profiling" keys override the global section
+        merged = dict(self.config)
+        merged.update(module_config.get('profiling', {}))
+        return merged
+
+    def install_signal_handler(self):
+        if not self.config.get('enabled') or not hasattr(signal, 'SIGUSR1'):
+            return
+        signal.signal(signal.SIGUSR1, self._on_signal)
+        logger.info("Profiling armed by SIGUSR1 (profiles the next run of every module)")
+
+    def _on_signal(self, signum, frame):
+        self.arm_all_at = time.time()
+
+    def _consume_flag(self, name, settings):
+        flag_name = settings.get('flag_file', DEFAULT_FLAG_FILE)
+        stem, ext = os.path.splitext(flag_name)
+        module_flag = os.path.join(self.log_dir, f"{stem}_{name}{ext}")
+        global_flag = os.path.join(self.log_dir, flag_name)
+
+        if os.path.exists(module_flag):
+            try:
+                os.remove(module_flag)
+            except OSError as e:
+                logger.error(f"Failed to remove profiling flag {module_flag}: {e}")
+            return True
+
+        if os.path.exists(global_flag):
+            # The global flag arms every module once, then is removed
+            try:
+                os.remove(global_flag)
+            except OSError as e:
+                logger.error(f"Failed to remove profiling flag {global_flag}: {e}")
+            self.arm_all_at = time.time()
+        return False
+
+    def _arm_reason(self, name, settings):
+        if self._consume_flag(name, settings):
+            return "flag file"
+        if self.arm_all_at and self.last_profiled.get(name, 0) < self.arm_all_at:
+            return "on demand"
+        if name in self.armed:
+            self.armed.discard(name)
+            return "threshold"
+        if settings.get('always_profile'):
+            return "always"
+        return None
+
+    def call(self, name, module_config, func, *args):
+        """Runs func(*args), profiling it when one of the triggers applies."""
+        settings = self.settings(module_config)
+        if not settings.get('enabled'):
+            return func(*args)
+
+        threshold = settings.get('threshold_seconds')
+        reason = self._arm_reason(name, settings)
+
+        if reason is None:
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                duration = time.perf_counter() - start
+                if threshold and duration > threshold:
+                    logger.warning(f"{name} run took {duration:.1f}s (threshold {threshold}s); profiling next run")
+                    self.armed.add(name)
+
+        self.last_profiled[name] = time.time()
+        profiler = self._start(settings)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            duration = time.perf_counter() - start
+            profiler[1]()
+            keep = reason != "always" or (threshold and duration > threshold)
+            if keep:
+                try:
+                    self._save(name, settings, profiler, duration, reason)
+                except Exception as e:
+                    logger.error(f"Failed to save profile for {name}: {e}")
+
+    def _start(self, settings):
+        choice = settings.get('profiler', 'auto').lower()
+        sampling = _load_sampling_profiler() if choice in ('auto', 'pyinstrument') else None
+        if choice == 'pyinstrument' and sampling is None:
+            logger.warning("pyinstrument is not installed, falling back to cProfile")
+
+        if sampling is not None:
+            prof = sampling(interval=settings.get('sample_interval_seconds', 0.001))
+            prof.start()
+            return 'pyinstrument', prof.stop, prof
+
+        prof = cProfile.Profile()
+        prof.enable()
+        return 'cprofile', prof.disable, prof
+
+    def _save(self, name, settings, profiler, duration, reason):
+        kind, _, prof = profiler
+        out_dir = os.path.join(self.log_dir, settings.get('directory', 'profiles'))
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+
+        # Microseconds keep back-to-back profiled runs of a module from overwriting each other
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        top = settings.get('top', 25)
+
+        if kind == 'pyinstrument':
+            path = os.path.join(out_dir, f"{name}_{stamp}.txt")
+            report = prof.output_text(unicode=False, color=False)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(report)
+            summary = "\n".join(report.splitlines()[:top + 10])
+        else:
+            path = os.path.join(out_dir, f"{name}_{stamp}.prof")
+            prof.dump_stats(path)
+            stream = io.StringIO()
+            stats = pstats.Stats(prof, stream=stream)
+            stats.sort_stats('cumulative').print_stats(top)
+            summary = stream.getvalue()
+
+        logger.info(f"Profiled {name} run ({reason}, {duration:.2f}s) -> {path}\n{summary}")
@@ -0,0 +1,225 @@
+import logging
+import sys
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("StateIndex")
+
+# Rows modified this close to the previous watermark are read again on the next delta,
+# so writes committed late (or with the same datetime tick) are not missed.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def _intern(value):
+    # Device IDs and IP type IDs repeat across many records; share one string per value
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class IPRecord:
+    __slots__ = ("ID", "DeviceID", "IPAddress", "IPAddressTypeID")
+
+    def __init__(self, row):
+        self.ID = row.ID
+        self.DeviceID = _intern(row.DeviceID)
+        self.IPAddress = row.IPAddress
+        self.IPAddressTypeID = _intern(row.IPAddressTypeID)
+
+
+class FileRecord:
+    """
+    Monitored file joined with its latest version. Attribute names match the columns of the
+    monitor query so monitor_files can process index records and DB rows the same way.
+    """
+    __slots__ = (
+        "ID", "DeviceID", "MonitoredFileVersionID", "AbsoluteDirectory", "FileName", "ParentDirectory",
+        "FileHash", "FileSize", "FileDateModified", "HashMode", "SampleBlockCount", "FullHashIntervalMinutes",
+        "LastFingerprint", "LastFileHash", "LastFullHashDate", "ChangeHistoryVersionNo",
+    )
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            value = getattr(row, name)
+            if name == "DeviceID":
+                value = _intern(value)
+            setattr(self, name, value)
+
+
+class StateIndex:
+    """
+    Resident index of device IPs and monitored files for the long-running scheduler.
+
+    The first refresh loads everything; later refreshes only read rows whose ModifiedDate
+    is newer than the last watermark (soft deletes included, which remove records). A full
+    reload runs every full_reload_minutes to pick up hard deletes. The monitor writes its
+    own changes (fingerprint cache, change history version) through to the records.
+    """
+
+    def __init__(self, full_reload_minutes=60):
+        self.full_reload_minutes = full_reload_minutes
+        self.ips = {}
+        self.ips_by_device = {}
+        self.files = {}
+        self.status_types = {}
+        self.ip_type_names = {}
+        self.status_row_ids = {}
+        self.watermark = None
+        self.last_full_reload = None
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, cursor):
+        cursor.execute("SELECT GETDATE() AS Now")
+        db_now = cursor.fetchone().Now
+
+        full = (
+            self.watermark is None
+            or datetime.now() - self.last_full_reload >= timedelta(minutes=self.full_reload_minutes)
+        )
+
+        cursor.execute("SELECT ID, Name FROM [ConnectionStatusTypes] WHERE IsDeleted = 0")
+        self.status_types = {row.Name: row.ID for row in cursor.fetchall()}
+        cursor.execute("SELECT ID, Name FROM IPAddressTypes")
+        self.ip_type_names = {_intern(row.ID): row.Name for row in cursor.fetchall()}
+
+        if full:
+            self._load_ips(cursor, None)
+            self._load_files(cursor, None)
+            self._load_status_rows(cursor)
+            self.last_full_reload = datetime.now()
+            logger.info(f"State index loaded: {len(self.ips)} IP addresses, {len(self.files)} monitored files")
+        else:
+            since = self.watermark - WATERMARK_OVERLAP
+            ip_changes = self._load_ips(cursor, since)
+            file_changes = self._load_files(cursor, since)
+            if ip_changes or file_changes:
+                logger.debug(f"State index delta: {ip_changes} IP address(es), {file_changes} monitored file(s)")
+
+        self.watermark = db_now
+
+    def _load_ips(self, cursor, since):
+        if since is None:
+            cursor.execute("""
+                SELECT ID, DeviceID, IPAddress, IPAddressTypeID, IsDeleted
+                FROM DeviceIPAddresses
+                WHERE IsDeleted = 0
+            """)
+            self.ips = {}
+        else:
+            cursor.execute("""
+                SELECT ID, DeviceID, IPAddress, IPAddressTypeID, IsDeleted
+                FROM DeviceIPAddresses
+                WHERE ModifiedDate >= ?
+            """, since)
+
+        rows = cursor.fetchall()
+        for row in rows:
+            if row.IsDeleted:
+                self.ips.pop(row.ID, None)
+                self.status_row_ids.pop(row.ID, None)
+            else:
+                self.ips[row.ID] = IPRecord(row)
+
+        if since is None or rows:
+            self._rebuild_ips_by_device()
+        return len(rows)
+
+    def _rebuild_ips_by_device(self):
+        by_device = {}
+        for record in self.ips.values():
+            by_device.setdefault(record.DeviceID, []).append(record)
+        # Same priority order as the monitor query: IPAddressType name, untyped last
+        for records in by_device.values():
+            records.sort(key=lambda r: self.ip_type_names.get(r.IPAddressTypeID) or 'zzz')
+        self.ips_by_device = by_device
+
+    def _load_files(self, cursor, since):
+        query = """
+            SELECT
+                mf.ID,
+                mf.DeviceID,
+                mf.IsDeleted,
+                v.ID AS MonitoredFileVersionID,
+                v.AbsoluteDirectory,
+                v.FileName,
+                v.ParentDirectory,
+                v.FileHash,
+                v.FileSize,
+                v.FileDateModified,
+                mf.HashMode,
+                mf.SampleBlockCount,
+                mf.FullHashIntervalMinutes,
+                mf.LastFingerprint,
+                mf.LastFileHash,
+                mf.LastFullHashDate,
+                COALESCE((SELECT MAX(VersionNo) FROM MonitoredFileChangeHistory WHERE MonitoredFileID = mf.ID), 0) AS ChangeHistoryVersionNo
+            FROM MonitoredFiles mf
+            LEFT JOIN MonitoredFileVersions v ON mf.ID = v.MonitoredFileID
+                AND v.VersionNo = (SELECT MAX(VersionNo) FROM MonitoredFileVersions WHERE MonitoredFileID = mf.ID)
+        """
+        if since is None:
+            cursor.execute(query + " WHERE mf.IsDeleted = 0")
+            self.files = {}
+        else:
+            cursor.execute(query + """
+                WHERE mf.ModifiedDate >= ?
+                   OR mf.ID IN (SELECT MonitoredFileID FROM MonitoredFileVersions WHERE ModifiedDate >= ?)
+            """, (since, since))
+
+        rows = cursor.fetchall()
+        for row in rows:
+            if row.IsDeleted:
+                self.files.pop(row.ID, None)
+            else:
+                self.files[row.ID] = FileRecord(row)
+        return len(rows)
+
+    def _load_status_rows(self, cursor):
+        cursor.execute("SELECT ID, DeviceIPAddressID FROM DeviceIPAddressConnectionStatus WHERE IsDeleted = 0")
+        self.status_row_ids = {row.DeviceIPAddressID: row.ID for row in cursor.fetchall()}
+
+    # ------------------------------------------------------------------
+    # Lookups and write-through
+    # ------------------------------------------------------------------
+
+    def ip_records(self):
+        return list(self.ips.values())
+
+    def ip_list_for_device(self, device_id):
+        return [r.IPAddress for r in self.ips_by_device.get(device_id, []) if r.IPAddress]
+
+    def file_records(self):
+        return list(self.files.values())
+
+    def status_row_id(self, ip_id):
+        return self.status_row_ids.get(ip_id)
+
+    def set_status_row_id(self, ip_id, status_row_id):
+        self.status_row_ids[ip_id] = status_row_id
+
+    def note_full_hash(self, file_id, fingerprint, file_hash, full_hash_date):
+        record = self.files.get(file_id)
+        if record:
+            record.LastFingerprint = fingerprint
+            record.LastFileHash = file_hash
+            record.LastFullHashDate = full_hash_date
+
+    def note_change_history(self, file_id, version_no):
+        record = self.files.get(file_id)
+        if record:
+            record.ChangeHistoryVersionNo = version_no
+
+
+# Process-wide index shared by ping_check and monitor_files when run from main.py
+_index = None
+
+
+def get_index(config):
+    """Returns the shared index when 'state_index' is enabled in config, otherwise None."""
+    global _index
+    index_cfg = config.get('state_index', {})
+    if not index_cfg.get('enabled'):
+        return None
+    if _index is None:
+        _index = StateIndex(index_cfg.get('full_reload_minutes', 60))
+    return _index